@@ -0,0 +1,395 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+"""Benchmark suite of horoscopy.
+
+Run ``make bench`` or ``python benchmarks/run.py`` to measure throughput,
+peak memory, and JIT warm-up, and to check accuracy against SPTK. A report
+is written as JSON, which can be compared with that of another commit by
+``--compare``. The exit status is nonzero if any accuracy gate fails.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from scipy.io import wavfile
+from scipy.linalg import hankel, toeplitz
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import horoscopy  # noqa: E402
+from horoscopy.math import solve_toeplitz_plus_hankel  # noqa: E402
+from horoscopy.mcep import _frame  # noqa: E402
+from horoscopy.utils import read_binary  # noqa: E402
+
+
+DATA_DIR = os.path.join(ROOT, 'tests', 'data')
+
+# Settings of the SPTK reference.
+SPTK = {'M': 24, 'n_fft': 512, 'hop_length': 80, 'win_length': 400,
+        'window': 'blackman'}
+
+# Maximum absolute errors allowed in accuracy gates.
+F8_TOLERANCE = 1e-6
+F4_TOLERANCE = 1e-4
+
+
+def _load_wave():
+    """Load the example waveform in 16-bit scale.
+    """
+
+    _, y = wavfile.read(os.path.join(DATA_DIR, 'example.wav'))
+    return y.astype(np.float64)
+
+
+def _spectrogram(y, n_fft, T):
+    """Make a magnitude spectrogram of T frames by repeating the waveform.
+    """
+
+    hop_length = n_fft // 4
+    n = (T - 1) * hop_length + n_fft
+    y = np.resize(y, n)
+    frames = _frame(y, n_fft, hop_length)
+    w = horoscopy.get_sptk_window('blackman', n_fft)
+    return np.abs(np.fft.rfft(frames * w, axis=1)).T + 1e-3
+
+
+def _toeplitz_plus_hankel_system(rng, N, K):
+    """Make K diagonally dominant Toeplitz plus Hankel systems.
+    """
+
+    t_c = rng.rand(N, K)
+    t_c[0] += N
+    t_r = np.copy(t_c)
+    h_c = rng.rand(N, K)
+    h_r = rng.rand(N, K)
+    h_r[-1] = h_c[0]
+    b = rng.rand(N, K)
+    return (t_c, t_r), (h_c, h_r), b
+
+
+def _measure(func, repeat, n_items):
+    """Measure time and peak memory of a function.
+
+    Returns
+    -------
+    result : dict
+        Minimum and median time in seconds, throughput in items per second,
+        and peak memory in bytes traced by tracemalloc.
+
+    """
+
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    t = min(times)
+    return {'time_min': t, 'time_median': float(np.median(times)),
+            'throughput': n_items / t, 'peak_bytes': peak}
+
+
+def _cases(quick):
+    """Enumerate benchmark cases.
+
+    Yields
+    ------
+    name : str
+        Name of the case.
+
+    params : dict
+        Parameters of the case.
+
+    func : callable
+        Function to be measured.
+
+    n_items : int [scalar]
+        Number of frames or systems processed by a call.
+
+    """
+
+    y = _load_wave()
+    sizes = (100, 1000) if quick else (100, 1000, 10000)
+    T0 = 1000
+
+    for T in sizes:
+        S = _spectrogram(y, 512, T)
+        yield ('stft_to_mcep', {'T': T, 'M': 24, 'n_fft': 512, 'alpha': 0.42},
+               lambda S=S: horoscopy.stft_to_mcep(S, M=24), T)
+
+    # The default settings are already covered by the sweep of T.
+    for M in (12, 48):
+        S = _spectrogram(y, 512, T0)
+        yield ('stft_to_mcep', {'T': T0, 'M': M, 'n_fft': 512, 'alpha': 0.42},
+               lambda S=S, M=M: horoscopy.stft_to_mcep(S, M=M), T0)
+
+    for n_fft in (256, 1024, 2048):
+        S = _spectrogram(y, n_fft, T0)
+        yield ('stft_to_mcep',
+               {'T': T0, 'M': 24, 'n_fft': n_fft, 'alpha': 0.42},
+               lambda S=S: horoscopy.stft_to_mcep(S, M=24), T0)
+
+    for alpha in (0.0, 0.31, 0.55):
+        S = _spectrogram(y, 512, T0)
+        yield ('stft_to_mcep', {'T': T0, 'M': 24, 'n_fft': 512,
+                                'alpha': alpha},
+               lambda S=S, a=alpha: horoscopy.stft_to_mcep(S, M=24, alpha=a),
+               T0)
+
+    # Frames of distinct alphas are analyzed by the recursions.
+    S = _spectrogram(y, 512, T0)
+    alphas = np.linspace(0.31, 0.55, T0)
+    yield ('stft_to_mcep', {'T': T0, 'M': 24, 'n_fft': 512,
+                            'alpha': 'per-frame'},
+           lambda S=S: horoscopy.stft_to_mcep(S, M=24, alpha=alphas), T0)
+
+    yield ('wave_to_mcep', {'N': len(y), 'M': 24, 'n_fft': 512},
+           lambda: horoscopy.wave_to_mcep(y, M=24, n_fft=512, hop_length=80,
+                                          win_length=400),
+           len(y) // 80 + 1)
+
+    for T in sizes:
+        C = np.random.RandomState(0).randn(257, T) * 0.1
+        for recursive in (True, False):
+            yield ('freqt', {'T': T, 'm': 256, 'M': 24,
+                             'recursive': recursive},
+                   lambda C=C, r=recursive: horoscopy.freqt(
+                       C, M=24, alpha=0.42, recursive=r), T)
+
+    for N in (13, 25, 49):
+        rng = np.random.RandomState(0)
+        K = T0
+        t, h, b = _toeplitz_plus_hankel_system(rng, N, K)
+        for parallel in (True, False):
+            yield ('solve_toeplitz_plus_hankel',
+                   {'N': N, 'K': K, 'parallel': parallel},
+                   lambda t=t, h=h, b=b, p=parallel:
+                   solve_toeplitz_plus_hankel(t, h, b, parallel=p), K)
+
+
+def _warm_up():
+    """Measure time to the first analysis in fresh interpreters.
+
+    Returns
+    -------
+    result : dict
+        Import time and time to the first result with an empty and a filled
+        kernel cache of numba, in seconds.
+
+    """
+
+    code = ('import time\n'
+            't = time.perf_counter()\n'
+            'import horoscopy\n'
+            't1 = time.perf_counter()\n'
+            'horoscopy.stft_to_mcep([[1.0], [2.0], [3.0]])\n'
+            't2 = time.perf_counter()\n'
+            'print(t1 - t, t2 - t)\n')
+    result = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, NUMBA_CACHE_DIR=cache_dir, PYTHONPATH=ROOT)
+        for key in ('cold', 'warm'):
+            out = subprocess.run([sys.executable, '-c', code], env=env,
+                                 check=True, stdout=subprocess.PIPE)
+            t_import, t_first = map(float, out.stdout.split())
+            result['import'] = t_import
+            result[key] = t_first
+    return result
+
+
+def _accuracy():
+    """Check agreement with SPTK and between algorithms.
+
+    Returns
+    -------
+    result : list of dict
+        Name, maximum absolute error, tolerance, and whether the gate is
+        passed.
+
+    """
+
+    y = _load_wave()
+    M = SPTK['M']
+    target = read_binary(os.path.join(DATA_DIR, 'example.mcep.from.sptk'),
+                         dim=M + 1).T
+    params = dict(SPTK)
+    checks = [
+        ('wave_to_mcep', horoscopy.wave_to_mcep(y, **params), target,
+         F8_TOLERANCE),
+        ('wave_to_mcep_blocks',
+         horoscopy.wave_to_mcep(y, max_frames=37, **params), target,
+         F8_TOLERANCE),
+        ('wave_to_mcep_n_jobs',
+         horoscopy.wave_to_mcep(y, n_jobs=2, **params), target,
+         F8_TOLERANCE),
+        ('wave_to_mcep_float32',
+         horoscopy.wave_to_mcep(y, dtype=np.float32, **params), target,
+         F4_TOLERANCE),
+    ]
+
+    C = np.random.RandomState(0).randn(257, 100) * 0.1
+    checks.append(('freqt_recursive_vs_matrix',
+                   horoscopy.freqt(C, M=M, recursive=True),
+                   horoscopy.freqt(C, M=M, recursive=False), F8_TOLERANCE))
+
+    N = M + 1
+    t, h, b = _toeplitz_plus_hankel_system(np.random.RandomState(0), N, 10)
+    A = np.stack([toeplitz(t[0][:, k], t[1][:, k]) +
+                  hankel(h[1][:, k], h[0][:, k]) for k in range(10)])
+    a = solve_toeplitz_plus_hankel(t, h, b)
+    checks.append(('solve_toeplitz_plus_hankel',
+                   np.einsum('kij,jk->ik', A, a), b, F8_TOLERANCE))
+
+    result = []
+    for name, actual, desired, tol in checks:
+        error = float(np.max(np.abs(actual - desired)))
+        result.append({'name': name, 'max_abs_error': error,
+                       'tolerance': tol, 'passed': error <= tol})
+    return result
+
+
+def _metadata():
+    """Describe the environment of a run.
+    """
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = 'unknown'
+
+    import numba
+    import scipy
+    return {
+        'commit': commit,
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'horoscopy': horoscopy.__version__,
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'numba': numba.__version__,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'num_threads': numba.get_num_threads(),
+    }
+
+
+def _key(case):
+    """Make a key identifying a case across reports.
+    """
+
+    return case['name'] + json.dumps(case['params'], sort_keys=True)
+
+
+def _print_report(report, base=None):
+    """Print a report, with ratios of throughput to a base report if given.
+    """
+
+    meta = report['metadata']
+    print('commit %s, numba %s, threads %d' %
+          (meta['commit'], meta['numba'], meta['num_threads']))
+
+    base_cases = {}
+    if base is not None:
+        base_cases = {_key(c): c for c in base['cases']}
+        print('compared with commit %s' % base['metadata']['commit'])
+
+    print('%-60s %12s %10s %8s' % ('case', 'items/s', 'peak MiB', 'ratio'))
+    for case in report['cases']:
+        params = ' '.join('%s=%s' % kv
+                          for kv in sorted(case['params'].items()))
+        ratio = ''
+        b = base_cases.get(_key(case))
+        if b is not None:
+            ratio = '%.2fx' % (case['throughput'] / b['throughput'])
+        print('%-60s %12.1f %10.2f %8s' % (
+            case['name'] + ' ' + params, case['throughput'],
+            case['peak_bytes'] / 2 ** 20, ratio))
+
+    w = report['warm_up']
+    print('import %.2f s, first call %.2f s (cold cache), %.2f s (warm cache)'
+          % (w['import'], w['cold'], w['warm']))
+
+    for a in report['accuracy']:
+        print('%-30s max abs error %.3g (tolerance %.0e) %s' % (
+            a['name'], a['max_abs_error'], a['tolerance'],
+            'ok' if a['passed'] else 'FAILED'))
+
+
+def main(argv=None):
+    """Run the benchmark suite.
+
+    Parameters
+    ----------
+    argv : list of str or None
+        Command line arguments. If None, sys.argv is used.
+
+    Returns
+    -------
+    status : int [scalar]
+        Exit status, which is nonzero if any accuracy gate fails.
+
+    """
+
+    parser = argparse.ArgumentParser(description='Benchmark horoscopy.')
+    parser.add_argument('-o', '--output-dir',
+                        default=os.path.join(ROOT, 'benchmarks', 'results'),
+                        help='directory of JSON reports')
+    parser.add_argument('-c', '--compare',
+                        help='JSON report to be compared with')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='number of measurements of each case')
+    parser.add_argument('--quick', action='store_true',
+                        help='skip the largest cases')
+    args = parser.parse_args(argv)
+
+    report = {
+        'metadata': _metadata(),
+        'warm_up': _warm_up(),
+        'accuracy': _accuracy(),
+        'cases': [],
+    }
+    for name, params, func, n_items in _cases(args.quick):
+        result = _measure(func, args.repeat, n_items)
+        report['cases'].append(dict(name=name, params=params, **result))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir,
+                        report['metadata']['commit'] + '.json')
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=1)
+
+    base = None
+    if args.compare is not None:
+        with open(args.compare) as f:
+            base = json.load(f)
+    _print_report(report, base)
+    print('report written to %s' % path)
+
+    return 0 if all(a['passed'] for a in report['accuracy']) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,62 @@
-from .freqt import *
-from .mcep import *
+import importlib
+import sys
+import types
+
 from .version import __version__
-from .window import *
+
+
+# Public names and their submodules. They are imported on first access so
+# that importing this package neither loads the kernels of numba nor scipy.
+_LAZY_NAMES = {
+    'McepAnalyzer': 'analyzer',
+    'stft_to_mcep_batch': 'batch',
+    'wave_to_mcep_batch': 'batch',
+    'freqt': 'freqt',
+    'mcep_to_envelope': 'mcep',
+    'mcep_to_stft': 'mcep',
+    'stft_to_mcep': 'mcep',
+    'wave_to_mcep': 'mcep',
+    'stft_to_mcep_memmap': 'outofcore',
+    'solve_toeplitz_plus_hankel': 'math',
+    'Profiler': 'profiler',
+    'StreamingAnalyzer': 'stream',
+    'check_alpha': 'utils',
+    'sr_to_alpha': 'utils',
+    'get_sptk_window': 'window',
+}
+
+_SUBMODULES = ('analyzer', 'batch', 'cache', 'cli', 'freqt', 'math', 'mcep',
+               'outofcore', 'profiler', 'server', 'stream', 'utils',
+               'window')
+
+__all__ = sorted(_LAZY_NAMES) + ['__version__']
+
+
+def __getattr__(name):
+    if name in _LAZY_NAMES:
+        module = importlib.import_module('.' + _LAZY_NAMES[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    if name in _SUBMODULES:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES) | set(_SUBMODULES))
+
+
+class _Package(types.ModuleType):
+    """Package binding functions instead of submodules of the same names.
+    """
+
+    def __setattr__(self, name, value):
+        # The import system binds a submodule to this package after loading
+        # it, which would hide the function of the same name, e.g., freqt.
+        if isinstance(value, types.ModuleType) and name in _LAZY_NAMES:
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
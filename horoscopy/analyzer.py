@@ -0,0 +1,354 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+import numba
+from numba import jit
+import numpy as np
+from scipy.fft import irfft
+
+from .cache import plan_cache
+from .freqt import _freqt_matrix
+from .math import _fix_breakdown, _merchant_parks
+from .mcep import _fused_matrix
+from .utils import check_alpha
+
+
+@jit(['void(f4[:, :], f8, f8[:, :])', 'void(f8[:, :], f8, f8[:, :])'],
+     nopython=True, nogil=True, cache=True)
+def _log_periodogram(S, eps, log_I):
+    """Compute log periodogram of S in frame-major order.
+    """
+    for t in range(log_I.shape[0]):
+        for k in range(log_I.shape[1]):
+            log_I[t, k] = 2 * np.log(S[k, t] + eps)
+
+
+@jit('void(f8[:, :], f8[:], f8[:, :])', nopython=True, nogil=True,
+     cache=True)
+def _subtract(r_t, a, b):
+    """Subtract a from each row of r_t to make right-hand side b.
+    """
+    for i in range(b.shape[0]):
+        for j in range(b.shape[1]):
+            b[i, j] = r_t[i, j] - a[j]
+
+
+@jit('b1(f8[:, :], f8[:, :])', nopython=True, nogil=True, cache=True)
+def _has_breakdown(r_t, grad):
+    """Check if the recursion broke down on any frame of finite input.
+    """
+    for i in range(grad.shape[0]):
+        broken = False
+        for j in range(grad.shape[1]):
+            if not np.isfinite(grad[i, j]):
+                broken = True
+                break
+        if broken:
+            for j in range(r_t.shape[1]):
+                if not np.isfinite(r_t[i, j]):
+                    broken = False
+                    break
+        if broken:
+            return True
+    return False
+
+
+@jit('i8(i8, b1, f8[:, :], f8[:, :], f8[:, :], f8[:], f8, f8[:, :], '
+     'f8[:, :], i8[:], i8[:], f8[:, :])', nopython=True, nogil=True,
+     cache=True)
+def _compact(k, check, r_t, grad, step, prev_epsilon, tol, mc, log_I, order,
+             n, out):
+    """Update active frames, check their convergence, and remove converged
+    ones.
+
+    As in :func:`horoscopy.mcep._newton`, a step making epsilon non-finite
+    or more than doubling it is halved instead of taking the gradient if
+    check is True. Converged frames are written to out and the remaining
+    frames are moved to the front of the working arrays. The number of
+    active frames is returned.
+    """
+    j = 0
+    for i in range(k):
+        t = order[i]
+        n[t] += 1
+        epsilon = r_t[i, 0]
+        retry = check and (not np.isfinite(epsilon) or
+                           2 * prev_epsilon[i] < epsilon)
+        if retry:
+            step[i] *= 0.5
+            mc[i] -= step[i]
+            epsilon = prev_epsilon[i]
+        else:
+            mc[i] += grad[i]
+            step[i] = grad[i]
+        relative_change = (prev_epsilon[i] - epsilon) / epsilon
+        if retry or tol <= relative_change:
+            if i != j:
+                mc[j] = mc[i]
+                step[j] = step[i]
+                log_I[j] = log_I[i]
+                order[j] = t
+            prev_epsilon[j] = epsilon
+            j += 1
+        else:
+            out[:, t] = mc[i]
+    return j
+
+
+@jit('void(i8, f8[:, :], i8[:], f8[:, :])', nopython=True, nogil=True,
+     cache=True)
+def _flush(k, mc, order, out):
+    """Write active frames to out.
+    """
+    for i in range(k):
+        out[:, order[i]] = mc[i]
+
+
+class McepAnalyzer(object):
+    """Mel-cepstral analyzer and synthesizer with reusable workspace.
+
+    Parameters
+    ----------
+    M : int >= 0 [scalar]
+        Order of mel-cepstral coefficients.
+
+    alpha : float in (-1, 1) [scalar]
+        Frequency warping factor.
+
+    n_fft : int > 1 [scalar]
+        Number of FFT bins.
+
+    n_iter : int >= 0 [scalar]
+        Number of iterations of Newton-Raphson method.
+
+    tol : float >= 0 [scalar]
+        Relative tolerance. Convergence is checked frame by frame.
+
+    eps : float >= 0 [scalar]
+        A very small value added to periodogram to avoid NaN caused by log().
+
+    Attributes
+    ----------
+    n_iter_ : np.ndarray [shape=(T,)]
+        Number of iterations performed on each frame in the last analysis.
+
+    Notes
+    -----
+    All transforms are precomputed as matrices, and the workspace is kept
+    between calls and grown only if more frames than ever are given. Thus
+    repeated calls with the same number of frames allocate no arrays except
+    the output if `out` is not given and a few small objects such as views.
+    Only if the Merchant-Parks recursion breaks down, the affected systems
+    are copied and solved directly. The results are the same as those of
+    :func:`horoscopy.stft_to_mcep` up to rounding errors.
+
+    See also
+    --------
+    horoscopy.stft_to_mcep : Convert spectrum to mel-cepstral coefficients.
+    horoscopy.mcep_to_stft : Convert mel-cepstral coefficients to spectrum.
+
+    """
+
+    def __init__(self, M=24, alpha=0.42, n_fft=512, n_iter=10, tol=1e-4,
+                 eps=0):
+        if M < 0:
+            raise ValueError('Order M must be a non-negative integer')
+
+        if n_fft <= 1 or n_fft % 2 != 0:
+            raise ValueError('FFT size must be a positive even integer')
+
+        if n_iter < 0:
+            raise ValueError(
+                'Number of iterations must be a non-negative integer')
+
+        if tol < 0:
+            raise ValueError(
+                'Relative tolerance must be a non-negative number')
+
+        if eps < 0:
+            raise ValueError('Value eps must be a non-negative number')
+
+        check_alpha(alpha)
+
+        self.M = M
+        self.alpha = alpha
+        self.n_fft = n_fft
+        self.n_iter = n_iter
+        self.tol = tol
+        self.eps = eps
+
+        L = M + 1
+        h_fft = n_fft // 2
+        key = ('analyzer', M, n_fft, float(alpha), np.dtype(np.float64).str)
+
+        # Compute matrices mapping log periodogram to the initial guess and
+        # periodogram to the input of the solver, in which irfft is fused.
+        def build():
+            C = irfft(np.eye(h_fft + 1), n=n_fft, axis=0)[:h_fft + 1]
+            C0 = np.copy(C)
+            C0[(0, -1), :] *= 0.5
+            G = np.matmul(_freqt_matrix(h_fft, M, alpha), C0)
+            W = np.matmul(_freqt_matrix(2 * M, h_fft, -alpha).T, C)
+            return np.concatenate([G, W])
+
+        GW = plan_cache.get(key, build)
+        self._G = GW[:L]
+        self._W = GW[L:]
+        self._F = _fused_matrix(M, n_fft, alpha)
+        self._a = (-alpha) ** np.arange(L)
+
+        self._capacity = -1
+        self._reserve(0)
+        self._T = 0
+
+    def _reserve(self, T):
+        """Grow workspace to hold T frames.
+        """
+
+        if T <= self._capacity:
+            return
+
+        L = self.M + 1
+        h_fft = self.n_fft // 2
+        n_blocks = max(1, min(T, 4 * numba.get_num_threads()))
+        self._log_I = np.empty((T, h_fft + 1))
+        self._D = np.empty((T, h_fft + 1))
+        self._mc = np.empty((T, L))
+        self._r_t = np.empty((T, 2 * L - 1))
+        self._b = np.empty((T, L))
+        self._grad = np.empty((T, L))
+        self._step = np.empty((T, L))
+        self._prev_epsilon = np.empty(T)
+        self._order = np.empty(T, dtype=np.int64)
+        self._n = np.empty(T, dtype=np.int64)
+        self._arange = np.arange(T)
+        self._work = np.empty((n_blocks, L, 10))
+        self._capacity = T
+
+    @property
+    def n_iter_(self):
+        return self._n[:self._T]
+
+    def analyze(self, S, out=None):
+        """Calculate mel-cepstral coefficients from a magnitude spectrogram.
+
+        Parameters
+        ----------
+        S : array-like [shape=(1 + n_fft / 2,) or (1 + n_fft / 2, T)]
+            Input linear magnitude spectrogram.
+
+        out : np.ndarray [shape=(M + 1,) or (M + 1, T)] or None
+            Output array. If None, a new array is allocated.
+
+        Returns
+        -------
+        mc : np.ndarray [shape=(M + 1,) or (M + 1, T)]
+            M-th order mel-cepstral coefficients.
+
+        """
+
+        S = np.asarray(S)
+        if S.dtype != np.float32:
+            S = S.astype(np.float64, copy=False)
+        is_vector_input = S.ndim == 1
+        if is_vector_input:
+            S = np.expand_dims(S, axis=-1)
+        elif S.ndim != 2:
+            raise ValueError('Input S must be 2-D matrix or 1-D vector')
+
+        h_fft = self.n_fft // 2
+        if S.shape[0] != h_fft + 1:
+            raise ValueError('S.shape[0] must be equal to 1 + n_fft / 2')
+
+        L = self.M + 1
+        T = S.shape[1]
+        shape = (L,) if is_vector_input else (L, T)
+        if out is None:
+            out = np.empty(shape)
+        elif out.shape != shape or out.dtype != np.float64:
+            raise ValueError('Output must be float64 array of shape of mc')
+        out2d = np.expand_dims(out, axis=-1) if is_vector_input else out
+
+        self._reserve(T)
+        self._T = T
+
+        # Compute log periodogram in frame-major order.
+        log_I = self._log_I[:T]
+        _log_periodogram(S, self.eps, log_I)
+
+        # Make initial guess.
+        mc = self._mc[:T]
+        np.matmul(log_I, self._G.T, out=mc)
+
+        # Perform Newton-Raphson method on active frames, which are kept in
+        # the first k rows of the workspace.
+        order = self._order[:T]
+        order[:] = self._arange[:T]
+        self._n[:T] = 0
+        self._prev_epsilon[:T] = np.inf
+        k = T
+        M = self.M
+        for i in range(self.n_iter):
+            D = self._D[:k]
+            np.matmul(mc[:k], self._F.T, out=D)
+            np.multiply(D, -2, out=D)
+            np.add(D, log_I[:k], out=D)
+            r_t = self._r_t[:k]
+            with np.errstate(over='ignore', invalid='ignore'):
+                np.exp(D, out=D)
+                np.matmul(D, self._W.T, out=r_t)
+            b = self._b[:k]
+            _subtract(r_t, self._a, b)
+
+            grad = self._grad[:k]
+            _merchant_parks(r_t[:, :L].T, r_t[:, :L].T, r_t[:, M:].T,
+                            r_t[:, :L].T, b.T, grad.T,
+                            self._work[:min(k, len(self._work))])
+            if _has_breakdown(r_t, grad):
+                _fix_breakdown(r_t[:, :L].T, r_t[:, :L].T, r_t[:, M:].T,
+                               r_t[:, :L].T, b.T, grad.T)
+
+            # Overshooting steps are taken back from the second iteration.
+            k = _compact(k, 0 < i, r_t, grad, self._step, self._prev_epsilon,
+                         self.tol, mc, log_I, order, self._n, out2d)
+            if k == 0:
+                break
+
+        _flush(k, mc, order, out2d)
+        return out
+
+    def synthesize(self, C, log=False, out=None):
+        """Calculate magnitude spectrogram from mel-cepstral coefficients.
+
+        Parameters
+        ----------
+        C : array-like [shape=(M + 1,) or (M + 1, T)]
+            Input mel-cepstral coefficients.
+
+        log : bool [scalar]
+            If True, return log-magnitude spectrogram.
+
+        out : np.ndarray [shape=(1 + n_fft / 2,) or (1 + n_fft / 2, T)]
+            Output array. If None, a new array is allocated.
+
+        Returns
+        -------
+        S : np.ndarray [shape=(1 + n_fft / 2,) or (1 + n_fft / 2, T)]
+            Converted magnitude spectrogram.
+
+        """
+
+        C = np.asarray(C)
+        if C.ndim not in (1, 2):
+            raise ValueError('Input C must be 2-D matrix or 1-D vector')
+
+        if C.shape[0] != self.M + 1:
+            raise ValueError('C.shape[0] must be equal to M + 1')
+
+        S = np.matmul(self._F, C, out=out)
+        if not log:
+            S = np.exp(S, out=S)
+        return S
@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+import numpy as np
+
+from .mcep import (_analyze_blocks, _check_frame_params, _check_params,
+                   _frame_wave, _frames_to_log_periodogram, _log_periodogram,
+                   _split_groups)
+from .utils import _asarray, _check_alphas, _group_by_alpha
+from .window import _get_cached_window
+
+
+def _concat_log_periodogram(offsets, log_periodogram):
+    """Make function computing log periodogram of concatenated utterances.
+
+    Parameters
+    ----------
+    offsets : np.ndarray [shape=(U + 1,)]
+        Index of the first frame of each utterance followed by the total
+        number of frames.
+
+    log_periodogram : callable
+        Function that takes an utterance index u and frame indices (s, e)
+        in the utterance and returns the log periodogram of the frames.
+
+    Returns
+    -------
+    func : callable
+        Function that takes frame indices (s, e) in the concatenated frames
+        and returns the log periodogram of frames s to e - 1.
+
+    """
+
+    def func(s, e):
+        u = np.searchsorted(offsets, s, side='right') - 1
+        if e <= offsets[u + 1]:
+            return log_periodogram(u, s - offsets[u], e - offsets[u])
+        log_I = []
+        while s < e:
+            e_u = min(e, offsets[u + 1])
+            if s < e_u:
+                log_I.append(
+                    log_periodogram(u, s - offsets[u], e_u - offsets[u]))
+            s = e_u
+            u += 1
+        return np.concatenate(log_I, axis=1)
+
+    return func
+
+
+def _analyze_utterances(offsets, log_periodogram, n_fft, M, alpha, n_iter,
+                        tol, init, energy_threshold, flatness_threshold,
+                        max_frames, memory_limit, n_jobs, dtype):
+    """Calculate mel-cepstral coefficients of utterances grouped by alpha.
+
+    Parameters
+    ----------
+    offsets : np.ndarray [shape=(U + 1,)]
+        Index of the first frame of each utterance followed by the total
+        number of frames.
+
+    log_periodogram : callable
+        Function that takes an utterance index u and frame indices (s, e)
+        in the utterance and returns the log periodogram of the frames.
+
+    alpha : float in (-1, 1) [scalar] or np.ndarray [shape=(U,)]
+        Frequency warping factor, or that of each utterance.
+
+    Returns
+    -------
+    mc : np.ndarray [shape=(M + 1, T)]
+        M-th order mel-cesptral coefficients of concatenated utterances.
+
+    n : np.ndarray [shape=(T,)]
+        Number of iterations performed on each frame.
+
+    fast : np.ndarray [shape=(T,)]
+        True if the frame took fast path.
+
+    """
+
+    groups = _group_by_alpha(alpha)
+    if len(groups) == 1:
+        return _analyze_blocks(
+            _concat_log_periodogram(offsets, log_periodogram), offsets[-1],
+            n_fft, M, groups[0][0], n_iter, tol, init, energy_threshold,
+            flatness_threshold, max_frames, memory_limit, n_jobs, dtype)
+
+    # Utterances of small groups are analyzed together frame by frame with
+    # their own alphas as in mcep._analyze_alphas.
+    lengths = np.diff(offsets)
+    groups, small = _split_groups(groups, M, n_fft, lengths)
+    if 0 < len(small):
+        groups.append((np.repeat(alpha[small], lengths[small]), small))
+
+    T = offsets[-1]
+    mc = np.empty((M + 1, T), dtype=dtype)
+    n = np.empty(T, dtype=np.int64)
+    fast = np.empty(T, dtype=bool)
+    for a, idx in groups:
+        # Utterances of the group are concatenated in their order.
+        lengths = offsets[idx + 1] - offsets[idx]
+        offsets_a = np.cumsum(np.concatenate([[0], lengths]))
+        mc_a, n_a, fast_a = _analyze_blocks(
+            _concat_log_periodogram(
+                offsets_a,
+                lambda u, s, e, idx=idx: log_periodogram(idx[u], s, e)),
+            offsets_a[-1], n_fft, M, a, n_iter, tol, init, energy_threshold,
+            flatness_threshold, max_frames, memory_limit, n_jobs, dtype)
+        for u, s_a, e_a in zip(idx, offsets_a[:-1], offsets_a[1:]):
+            mc[:, offsets[u]:offsets[u + 1]] = mc_a[:, s_a:e_a]
+            n[offsets[u]:offsets[u + 1]] = n_a[s_a:e_a]
+            fast[offsets[u]:offsets[u + 1]] = fast_a[s_a:e_a]
+    return mc, n, fast
+
+
+def _split(mc, n, fast, offsets, return_n_iter, return_mask):
+    """Split concatenated results into views of each utterance.
+    """
+
+    mc = [mc[:, s:e] for s, e in zip(offsets[:-1], offsets[1:])]
+    n = [n[s:e] for s, e in zip(offsets[:-1], offsets[1:])]
+    fast = [fast[s:e] for s, e in zip(offsets[:-1], offsets[1:])]
+
+    if return_n_iter and return_mask:
+        return mc, n, fast
+    elif return_n_iter:
+        return mc, n
+    elif return_mask:
+        return mc, fast
+    return mc
+
+
+def stft_to_mcep_batch(S, M=24, alpha=0.42, n_iter=10, tol=1e-4, eps=0,
+                       sr=None, init=None, energy_threshold=None,
+                       flatness_threshold=None, max_frames=None,
+                       memory_limit=None, n_jobs=None, dtype=np.float64,
+                       return_n_iter=False, return_mask=False):
+    """Calculate mel-cepstral coefficients from magnitude spectrograms.
+
+    Parameters
+    ----------
+    S : list of array-like [shape=(1 + n_fft / 2, T_i)]
+        Input linear magnitude spectrograms of different lengths.
+
+    alpha : float in (-1, 1) [scalar] or array-like [shape=(U,)]
+        Frequency warping factor, or that of each spectrogram, e.g., of each
+        speaker.
+
+    init : None, 'previous', or array-like [shape=(M + 1,)]
+        Initial mel-cepstral coefficients of Newton-Raphson method.
+
+    Returns
+    -------
+    mc : list of np.ndarray [shape=(M + 1, T_i)]
+        M-th order mel-cesptral coefficients of each spectrogram.
+
+    n_iter : list of np.ndarray [shape=(T_i,)]
+        Number of iterations performed on each frame until convergence.
+        Returned only if `return_n_iter` is True.
+
+    mask : list of np.ndarray [shape=(T_i,)]
+        True if the frame took fast path. Returned only if `return_mask` is
+        True.
+
+    Notes
+    -----
+    The frames of all spectrograms are analyzed together as if they were
+    concatenated, so the per-call costs are paid only once. The results are
+    views of a single array. If `init` is 'previous', the first frame of a
+    spectrogram may be seeded from the last frame of the preceding one, so
+    the results may differ from those of separate calls within the
+    tolerance. Spectrograms of different frequency warping factors are
+    analyzed in separate groups.
+
+    See also
+    --------
+    horoscopy.stft_to_mcep : Description of the other parameters.
+
+    """
+
+    S = [_asarray(s) for s in S]
+    if not S:
+        raise ValueError('Input S must not be empty')
+    for s in S:
+        if s.ndim != 2 or s.shape[0] != S[0].shape[0]:
+            raise ValueError('Inputs S must be 2-D matrices of the same '
+                             'number of FFT bins')
+    if S[0].shape[0] <= 1:
+        raise ValueError('S.shape[0] must be greater than 1')
+
+    init, alpha, dtype = _check_params(M, alpha, n_iter, tol, eps, sr, init,
+                                       energy_threshold, flatness_threshold,
+                                       max_frames, memory_limit, n_jobs,
+                                       dtype)
+    if isinstance(init, np.ndarray) and 1 < init.shape[1]:
+        raise ValueError('init must be a vector')
+    alpha = _check_alphas(alpha, len(S))
+
+    n_fft = 2 * (S[0].shape[0] - 1)
+    offsets = np.cumsum([0] + [s.shape[1] for s in S])
+    fast_path = energy_threshold is not None or flatness_threshold is not None
+    mc, n, fast = _analyze_utterances(
+        offsets,
+        lambda u, s, e: _log_periodogram(S[u][:, s:e], eps, fast_path, dtype),
+        n_fft, M, alpha, n_iter, tol, init, energy_threshold,
+        flatness_threshold, max_frames, memory_limit, n_jobs, dtype)
+
+    return _split(mc, n, fast, offsets, return_n_iter, return_mask)
+
+
+def wave_to_mcep_batch(y, M=24, alpha=0.42, n_fft=512, hop_length=None,
+                       win_length=None, window='blackman', center=True,
+                       n_iter=10, tol=1e-4, eps=0, sr=None, init=None,
+                       energy_threshold=None, flatness_threshold=None,
+                       max_frames=None, memory_limit=None, n_jobs=None,
+                       dtype=np.float64, return_n_iter=False,
+                       return_mask=False):
+    """Calculate mel-cepstral coefficients from waveforms.
+
+    Parameters
+    ----------
+    y : list of array-like [shape=(N_i,)]
+        Input waveforms of different lengths.
+
+    alpha : float in (-1, 1) [scalar] or array-like [shape=(U,)]
+        Frequency warping factor, or that of each waveform.
+
+    init : None, 'previous', or array-like [shape=(M + 1,)]
+        Initial mel-cepstral coefficients of Newton-Raphson method.
+
+    Returns
+    -------
+    mc : list of np.ndarray [shape=(M + 1, T_i)]
+        M-th order mel-cesptral coefficients of each waveform.
+
+    n_iter : list of np.ndarray [shape=(T_i,)]
+        Number of iterations performed on each frame until convergence.
+        Returned only if `return_n_iter` is True.
+
+    mask : list of np.ndarray [shape=(T_i,)]
+        True if the frame took fast path. Returned only if `return_mask` is
+        True.
+
+    See also
+    --------
+    horoscopy.wave_to_mcep : Description of the other parameters.
+    stft_to_mcep_batch : Notes on batch processing.
+
+    """
+
+    if len(y) == 0:
+        raise ValueError('Input y must not be empty')
+
+    hop_length, win_length = _check_frame_params(n_fft, hop_length,
+                                                 win_length)
+    init, alpha, dtype = _check_params(M, alpha, n_iter, tol, eps, sr, init,
+                                       energy_threshold, flatness_threshold,
+                                       max_frames, memory_limit, n_jobs,
+                                       dtype)
+    if isinstance(init, np.ndarray) and 1 < init.shape[1]:
+        raise ValueError('init must be a vector')
+    alpha = _check_alphas(alpha, len(y))
+
+    frames = [_frame_wave(y_u, n_fft, hop_length, win_length, center)
+              for y_u in y]
+    w = _get_cached_window(window, win_length)
+
+    offsets = np.cumsum([0] + [len(f) for f in frames])
+    fast_path = energy_threshold is not None or flatness_threshold is not None
+    mc, n, fast = _analyze_utterances(
+        offsets,
+        lambda u, s, e: _frames_to_log_periodogram(
+            frames[u][s:e], w, n_fft, eps, fast_path, dtype),
+        n_fft, M, alpha, n_iter, tol, init, energy_threshold,
+        flatness_threshold, max_frames, memory_limit, n_jobs, dtype)
+
+    return _split(mc, n, fast, offsets, return_n_iter, return_mask)
@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+from collections import namedtuple, OrderedDict
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zipfile
+
+import numpy as np
+
+from .profiler import _count, _stage
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class PlanCache(object):
+    """Thread-safe LRU cache of transform matrices.
+
+    Parameters
+    ----------
+    maxsize : int > 0 [scalar]
+        Maximum number of cached plans. The least recently used plan is
+        evicted when the cache is full.
+
+    Notes
+    -----
+    A plan is built outside of the lock, so a slow build does not block
+    lookups of other plans. If two threads build the same plan at the same
+    time, the first inserted one is kept and returned to both threads.
+
+    """
+
+    def __init__(self, maxsize=32):
+        if maxsize <= 0:
+            raise ValueError('Cache size must be a positive integer')
+
+        self._maxsize = maxsize
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._plans
+
+    def __len__(self):
+        with self._lock:
+            return len(self._plans)
+
+    def get(self, key, builder):
+        """Get a plan, building it if it is not cached.
+
+        Parameters
+        ----------
+        key : hashable
+            Key identifying the plan.
+
+        builder : callable
+            Function with no arguments that returns the plan.
+
+        Returns
+        -------
+        plan : object
+            Cached plan. Arrays are returned as read-only.
+
+        """
+
+        with self._lock:
+            if key in self._plans:
+                self._plans.move_to_end(key)
+                self._hits += 1
+                _count('plan_cache_hits')
+                return self._plans[key]
+            self._misses += 1
+        _count('plan_cache_misses')
+
+        with _stage('plan_build'):
+            plan = builder()
+        if hasattr(plan, 'setflags'):
+            plan.setflags(write=False)
+
+        with self._lock:
+            if key in self._plans:
+                self._plans.move_to_end(key)
+                return self._plans[key]
+            self._plans[key] = plan
+            if self._maxsize < len(self._plans):
+                self._plans.popitem(last=False)
+        return plan
+
+    def info(self):
+        """Report cache statistics.
+
+        Returns
+        -------
+        info : CacheInfo
+            Named tuple of (hits, misses, maxsize, currsize).
+
+        """
+
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._maxsize,
+                             len(self._plans))
+
+    def clear(self):
+        """Remove all plans and reset statistics.
+        """
+
+        with self._lock:
+            self._plans.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+def _to_builtin(o):
+    """Convert a numpy scalar to the Python object for JSON serialization.
+    """
+
+    if isinstance(o, np.generic):
+        return o.item()
+    raise TypeError('Object of type %s is not JSON serializable' %
+                    type(o).__name__)
+
+
+def _digest(*args):
+    """Compute a hash of arrays and JSON-serializable objects.
+
+    Parameters
+    ----------
+    args : tuple
+        Arrays and JSON-serializable objects.
+
+    Returns
+    -------
+    key : str
+        Hexadecimal digest.
+
+    """
+
+    h = hashlib.blake2b(digest_size=20)
+    for a in args:
+        if isinstance(a, np.ndarray):
+            h.update(json.dumps(['ndarray', a.dtype.str, a.shape]).encode())
+            h.update(memoryview(np.ascontiguousarray(a)).cast('B'))
+        else:
+            # Numpy scalars hash the same as the Python numbers they equal.
+            h.update(json.dumps(a, default=_to_builtin).encode())
+        # Separate arguments so that their boundaries are unambiguous.
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+class DiskCache(object):
+    """Persistent LRU cache of arrays shared by processes.
+
+    Parameters
+    ----------
+    path : str
+        Directory storing cached entries. It is created if it does not
+        exist.
+
+    max_bytes : int > 0 [scalar]
+        Maximum total size of cached entries in bytes. The least recently
+        used entries are evicted when the cache is full.
+
+    Notes
+    -----
+    Each entry is a file named by its key. Entries are written to temporary
+    files and renamed, so other processes never see partial entries, and
+    their modification times are updated on hits to track recency. Two
+    processes missing the same key at the same time both build the entry
+    and the later one is kept. Statistics are counted in this process.
+
+    """
+
+    _EXT = '.npz'
+
+    def __init__(self, path, max_bytes=2 ** 30):
+        if max_bytes <= 0:
+            raise ValueError('Cache size must be a positive integer')
+
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _entries(self):
+        """List entries with their modification times and sizes.
+        """
+
+        entries = []
+        with os.scandir(self.path) as it:
+            for e in it:
+                if not e.name.endswith(self._EXT):
+                    continue
+                try:
+                    st = e.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, e.path))
+        return entries
+
+    def __contains__(self, key):
+        return os.path.exists(os.path.join(self.path, key + self._EXT))
+
+    def __len__(self):
+        return len(self._entries())
+
+    def _load(self, filename):
+        """Load arrays of an entry, returning None if it is unavailable.
+        """
+
+        try:
+            with np.load(filename, allow_pickle=False) as f:
+                arrays = tuple(f['arr_%d' % i] for i in range(len(f.files)))
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            # The entry is missing, just evicted, corrupted, or not written
+            # by us.
+            return None
+        try:
+            os.utime(filename)
+        except OSError:
+            pass
+        return arrays
+
+    def _store(self, filename, arrays):
+        """Write an entry atomically and evict old entries.
+        """
+
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, *arrays)
+            os.replace(tmp, filename)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        self._evict()
+
+    def _evict(self):
+        """Remove the least recently used entries exceeding the limit.
+        """
+
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, filename in entries:
+            if total <= self._max_bytes:
+                break
+            try:
+                os.remove(filename)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def get(self, key, builder):
+        """Get arrays, building them if they are not cached.
+
+        Parameters
+        ----------
+        key : str
+            Key identifying the arrays, which must be a valid filename.
+
+        builder : callable
+            Function with no arguments that returns a tuple of arrays.
+
+        Returns
+        -------
+        arrays : tuple of np.ndarray
+            Cached or built arrays.
+
+        """
+
+        filename = os.path.join(self.path, key + self._EXT)
+        arrays = self._load(filename)
+        with self._lock:
+            if arrays is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        _count('disk_cache_misses' if arrays is None else 'disk_cache_hits')
+        if arrays is not None:
+            return arrays
+
+        arrays = tuple(builder())
+        self._store(filename, arrays)
+        return arrays
+
+    def info(self):
+        """Report cache statistics.
+
+        Returns
+        -------
+        info : CacheInfo
+            Named tuple of (hits, misses, maxsize, currsize), where sizes are
+            in bytes.
+
+        """
+
+        currsize = sum(size for _, size, _ in self._entries())
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._max_bytes,
+                             currsize)
+
+    def clear(self):
+        """Remove all entries and reset statistics.
+        """
+
+        for _, _, filename in self._entries():
+            try:
+                os.remove(filename)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+
+
+# Shared by all transforms in this package.
+plan_cache = PlanCache()
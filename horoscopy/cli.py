@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+import argparse
+from concurrent.futures import as_completed, ProcessPoolExecutor
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.io import wavfile
+
+from .mcep import wave_to_mcep
+from .utils import sr_to_alpha, write_binary
+from .version import __version__
+
+
+# Name of the file recording the parameters used for each output.
+MANIFEST = '.horoscopy.json'
+
+
+def _list_inputs(inputs, file_list, ext):
+    """List input files with their relative output paths.
+
+    Parameters
+    ----------
+    inputs : list of str
+        Input files or directories. Directories are searched recursively
+        for files of the given extension.
+
+    file_list : str or None
+        File containing an input filename per line.
+
+    ext : str
+        Extension of input files searched in directories.
+
+    Returns
+    -------
+    pairs : list of (str, str)
+        Pairs of an input path and its path relative to the output
+        directory without extension. Files given by absolute paths or
+        paths outside of the current directory are placed at the top of
+        the output directory.
+
+    Raises
+    ------
+    ValueError
+        If different inputs have the same output path.
+
+    """
+
+    names = list(inputs)
+    if file_list is not None:
+        with open(file_list) as f:
+            names.extend(line.strip() for line in f if line.strip())
+
+    pairs = []
+    for name in names:
+        if os.path.isdir(name):
+            for root, dirs, files in os.walk(name):
+                dirs.sort()
+                for filename in sorted(files):
+                    if filename.endswith(ext):
+                        path = os.path.join(root, filename)
+                        rel = os.path.relpath(path, name)
+                        pairs.append((path, os.path.splitext(rel)[0]))
+        else:
+            rel = os.path.normpath(name)
+            if os.path.isabs(rel) or rel.startswith(os.pardir):
+                rel = os.path.basename(rel)
+            pairs.append((name, os.path.splitext(rel)[0]))
+
+    # Outputs of different inputs must not overwrite each other.
+    sources = {}
+    for path, rel in pairs:
+        if sources.setdefault(rel, path) != path:
+            raise ValueError('Inputs %s and %s have the same output path' %
+                             (sources[rel], path))
+    return pairs
+
+
+def _load_manifest(output_dir):
+    """Load parameter hashes of existing outputs.
+    """
+
+    try:
+        with open(os.path.join(output_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(output_dir, manifest):
+    """Save parameter hashes of outputs atomically.
+    """
+
+    path = os.path.join(output_dir, MANIFEST)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=0, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _is_up_to_date(in_path, out_path, key, manifest, rel):
+    """Check whether an output is newer than its input and made with the
+    same parameters.
+    """
+
+    try:
+        return (manifest.get(rel) == key and
+                os.path.getmtime(in_path) <= os.path.getmtime(out_path))
+    except OSError:
+        return False
+
+
+def _analyze_file(in_path, out_path, params):
+    """Analyze a wav file and write mel-cepstra as a binary file.
+
+    Parameters
+    ----------
+    in_path : str
+        Input wav file.
+
+    out_path : str
+        Output file of float64 mel-cepstral coefficients in frame-major
+        order as SPTK.
+
+    params : dict
+        Keyword arguments of :func:`horoscopy.wave_to_mcep`, where alpha
+        may be None to compute it from the sampling rate.
+
+    Returns
+    -------
+    T : int [scalar]
+        Number of frames.
+
+    duration : float [scalar]
+        Duration of input in seconds.
+
+    """
+
+    sr, y = wavfile.read(in_path)
+    if y.ndim != 1:
+        raise ValueError('Only monaural audio is supported')
+    # Scale samples to the range of 16-bit integers as SPTK expects.
+    if np.issubdtype(y.dtype, np.floating):
+        y = y * 32768
+    elif np.issubdtype(y.dtype, np.integer):
+        bits = 8 * y.dtype.itemsize
+        x = y.astype(np.float64)
+        if np.issubdtype(y.dtype, np.unsignedinteger):
+            x -= 2.0 ** (bits - 1)
+        y = x * 2.0 ** (16 - bits)
+
+    params = dict(params)
+    if params['alpha'] is None:
+        params['alpha'] = sr_to_alpha(sr, refine=True)
+    mc = wave_to_mcep(y, n_jobs=1, **params)
+
+    # Write to a temporary file first so that an interrupted run does not
+    # leave a truncated output looking up to date.
+    os.makedirs(os.path.dirname(out_path) or os.curdir, exist_ok=True)
+    tmp = out_path + '.tmp'
+    write_binary(tmp, mc.T, dtype='double', endian='<')
+    os.replace(tmp, out_path)
+    return mc.shape[1], len(y) / sr
+
+
+def get_parser():
+    """Create the argument parser of the command line interface.
+
+    Returns
+    -------
+    parser : argparse.ArgumentParser
+        Parser of arguments.
+
+    """
+
+    parser = argparse.ArgumentParser(
+        prog='horoscopy',
+        description='Extract mel-cepstral coefficients from wav files.')
+    parser.add_argument('inputs', nargs='*',
+                        help='input wav files or directories')
+    parser.add_argument('-l', '--file-list',
+                        help='file listing input wav files')
+    parser.add_argument('-o', '--output-dir', required=True,
+                        help='output directory')
+    parser.add_argument('--ext', default='.mcep',
+                        help='extension of output files')
+    parser.add_argument('-m', '--order', type=int, default=24,
+                        help='order of mel-cepstrum')
+    parser.add_argument('-a', '--alpha', type=float, default=None,
+                        help='frequency warping factor; if omitted, it is '
+                        'computed from the sampling rate')
+    parser.add_argument('--n-fft', type=int, default=512,
+                        help='FFT size')
+    parser.add_argument('--hop-length', type=int, default=80,
+                        help='frame shift in samples')
+    parser.add_argument('--win-length', type=int, default=400,
+                        help='window length in samples')
+    parser.add_argument('--window', default='blackman',
+                        help='window type')
+    parser.add_argument('--n-iter', type=int, default=10,
+                        help='maximum number of iterations')
+    parser.add_argument('--tol', type=float, default=1e-4,
+                        help='relative tolerance')
+    parser.add_argument('--eps', type=float, default=0,
+                        help='small value added to spectrum')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='number of processes')
+    parser.add_argument('-f', '--force', action='store_true',
+                        help='overwrite outputs even if up to date')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='do not report progress')
+    parser.add_argument('--version', action='version',
+                        version='%(prog)s ' + __version__)
+    return parser
+
+
+def main(argv=None):
+    """Run the command line interface.
+
+    Parameters
+    ----------
+    argv : list of str or None
+        Command line arguments. If None, sys.argv is used.
+
+    Returns
+    -------
+    status : int [scalar]
+        Exit status, which is nonzero if any file failed.
+
+    Notes
+    -----
+    Each worker process reads its input and writes its output by itself,
+    so only filenames and small statistics cross process boundaries. An
+    output is skipped if it is newer than its input and the manifest in
+    the output directory records the same parameters for it.
+
+    """
+
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    params = {
+        'M': args.order,
+        'alpha': args.alpha,
+        'n_fft': args.n_fft,
+        'hop_length': args.hop_length,
+        'win_length': args.win_length,
+        'window': args.window,
+        'n_iter': args.n_iter,
+        'tol': args.tol,
+        'eps': args.eps,
+    }
+    key = hashlib.sha1(json.dumps(
+        [__version__, params], sort_keys=True).encode()).hexdigest()
+
+    try:
+        pairs = _list_inputs(args.inputs, args.file_list, '.wav')
+    except ValueError as e:
+        parser.error(str(e))
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest = _load_manifest(args.output_dir)
+
+    jobs = []
+    for in_path, rel in pairs:
+        rel = rel + args.ext
+        out_path = os.path.join(args.output_dir, rel)
+        up_to_date = _is_up_to_date(in_path, out_path, key, manifest, rel)
+        if args.force or not up_to_date:
+            jobs.append((in_path, out_path, rel))
+
+    n_frames = 0
+    duration = 0
+    n_failed = 0
+    start = time.time()
+    # Workers are spawned rather than forked since forking a process after
+    # the threading layer of numba is initialized is not safe.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs),
+                             mp_context=context) as executor:
+        futures = {
+            executor.submit(_analyze_file, in_path, out_path, params): (
+                in_path, rel)
+            for in_path, out_path, rel in jobs}
+        for i, future in enumerate(as_completed(futures)):
+            in_path, rel = futures[future]
+            try:
+                T, d = future.result()
+            except Exception as e:
+                n_failed += 1
+                manifest.pop(rel, None)
+                print('%s: %s' % (in_path, e), file=sys.stderr)
+                continue
+            n_frames += T
+            duration += d
+            manifest[rel] = key
+            if (i + 1) % 1000 == 0:
+                _save_manifest(args.output_dir, manifest)
+    _save_manifest(args.output_dir, manifest)
+    elapsed = time.time() - start
+
+    if not args.quiet:
+        print('%d files processed, %d skipped, %d failed in %.2f s' %
+              (len(jobs) - n_failed, len(pairs) - len(jobs), n_failed,
+               elapsed), file=sys.stderr)
+        if 0 < elapsed and 0 < n_frames:
+            print('%.1f frames/s, %.1fx real time' %
+                  (n_frames / elapsed, duration / elapsed), file=sys.stderr)
+
+    return 1 if n_failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
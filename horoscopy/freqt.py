@@ -4,18 +4,124 @@
 # Copyright (c) 2020 Takenori Yoshimura
 # Licensed under the MIT license
 
+from numba import jit, prange
 import numpy as np
 
-from .utils import _asarray, check_alpha
+from .cache import plan_cache
+from .math import _copy_function
+from .utils import _asarray, _check_alphas, _check_dtype, _group_by_alpha
 
 
-def freqt(C, M=24, alpha=0.42, recursive=True):
-    """Perform frequency transform.
+_FREQT_SIGNATURE = [
+    'f8[:, :](f8[:, :], i8, f8[:])',
+    'f4[:, :](f4[:, :], i8, f4[:])',
+]
+
+
+# Number of frames transformed at once by a thread. The recursion has a
+# dependency chain along the order, so frames are processed side by side to
+# let the innermost loop be vectorized.
+_FREQT_BLOCK = 16
+
+
+@jit(_FREQT_SIGNATURE, nopython=True, nogil=True, parallel=True, cache=True)
+def _freqt_recursive(C, M, alphas):
+    """Perform frequency transform by the recursive algorithm.
+
+    The frequency warping factor of the t-th frame is alphas[t], or
+    alphas[0] if alphas has only one element.
+    """
+    K, T = C.shape
+    L = M + 1
+    G = np.empty((L, T), dtype=C.dtype)
+    for blk in prange((T + _FREQT_BLOCK - 1) // _FREQT_BLOCK):
+        s = blk * _FREQT_BLOCK
+        n = min(_FREQT_BLOCK, T - s)
+        a = np.empty(n, dtype=C.dtype)
+        for t in range(n):
+            a[t] = alphas[0] if alphas.shape[0] == 1 else alphas[s + t]
+        g = np.zeros((L, n), dtype=C.dtype)
+        d = np.empty(n, dtype=C.dtype)
+        for i in range(K - 1, -1, -1):
+            # Keep the previous value of g[j - 1] instead of a copy of g.
+            for t in range(n):
+                d[t] = g[0, t]
+                g[0, t] = C[i, s + t] + a[t] * d[t]
+            if 1 < L:
+                for t in range(n):
+                    d1 = g[1, t]
+                    g[1, t] = (1 - a[t] * a[t]) * d[t] + a[t] * d1
+                    d[t] = d1
+            for j in range(2, L):
+                for t in range(n):
+                    dj = g[j, t]
+                    g[j, t] = d[t] + a[t] * (dj - g[j - 1, t])
+                    d[t] = dj
+        G[:, s:s + n] = g
+    return G
+
+
+@jit(_FREQT_SIGNATURE, nopython=True, nogil=True, parallel=True, cache=True)
+def _freqt_transposed(G, m, alphas):
+    """Multiply the transpose of frequency transform matrix by each frame.
+
+    The t-th column of the output is ``A.T G[:, t]``, where A is the matrix
+    transforming a sequence of order m to that of order G.shape[0] - 1 by
+    alphas[t], or alphas[0] if alphas has only one element. The recursion
+    is the adjoint of that of :func:`_freqt_recursive`.
+    """
+    L, T = G.shape
+    K = m + 1
+    C = np.empty((K, T), dtype=G.dtype)
+    for blk in prange((T + _FREQT_BLOCK - 1) // _FREQT_BLOCK):
+        s = blk * _FREQT_BLOCK
+        n = min(_FREQT_BLOCK, T - s)
+        a = np.empty(n, dtype=G.dtype)
+        for t in range(n):
+            a[t] = alphas[0] if alphas.shape[0] == 1 else alphas[s + t]
+        g = G[:, s:s + n].copy()
+        d = np.empty(n, dtype=G.dtype)
+        for i in range(K):
+            # Run the recursion backward from the highest order, where d
+            # holds the updated value of g[j + 1].
+            d[:] = 0
+            for j in range(L - 1, 0, -1):
+                for t in range(n):
+                    gj = g[j, t] - a[t] * d[t]
+                    g[j, t] = a[t] * gj + d[t]
+                    d[t] = gj
+            for t in range(n):
+                C[i, s + t] = g[0, t]
+                g[0, t] = (1 - a[t] * a[t]) * d[t] + a[t] * g[0, t]
+    return C
+
+
+# Transforms are built by the serial kernel, so building them from many
+# threads at once, e.g., from the workers of the analysis server, does not
+# run the parallel kernel concurrently. The serial kernels also transform
+# frames of distinct alphas in such threads.
+_freqt_recursive_serial = jit(
+    _FREQT_SIGNATURE, nopython=True, nogil=True, cache=True)(
+        _copy_function(_freqt_recursive.py_func, '_freqt_recursive_serial'))
+
+_freqt_transposed_serial = jit(
+    _FREQT_SIGNATURE, nopython=True, nogil=True, cache=True)(
+        _copy_function(_freqt_transposed.py_func, '_freqt_transposed_serial'))
+
+
+def _freqt_key(m, M, alpha, dtype=np.float64):
+    """Make a key of frequency transform matrix in plan cache.
+    """
+    return ('freqt', m, M, float(alpha), np.dtype(dtype).str)
+
+
+def _freqt_matrix(m, M, alpha, dtype=np.float64):
+    """Get frequency transform matrix from plan cache.
 
     Parameters
     ----------
-    C : array_like [shape=(m + 1,) or (m + 1, T)]
-        Minimum phase sequence.
+    m : int >= 0 [scalar]
+        Order of input sequence.
 
     M : int >= 0 [scalar]
         Order of warped sequence.
@@ -23,8 +129,73 @@ def freqt(C, M=24, alpha=0.42, recursive=True):
     alpha : float in (-1, 1) [scalar]
         Frequency warping factor.
 
+    dtype : np.dtype
+        Data type of the matrix.
+
+    Returns
+    -------
+    A : np.ndarray [shape=(M + 1, m + 1)]
+        Read-only matrix satisfying ``G = A C``.
+
+    """
+
+    # The transform is linear, so its matrix is the transform of identity.
+    # It is computed in double precision regardless of dtype.
+    def build():
+        K = m + 1
+        A = _freqt_recursive_serial(np.eye(K), M, np.array([alpha]))
+        return A.astype(dtype, copy=False)
+
+    return plan_cache.get(_freqt_key(m, M, alpha, dtype), build)
+
+
+def _use_recursive(m, T):
+    """Decide whether the recursive algorithm is faster than matrix one.
+
+    Parameters
+    ----------
+    m : int >= 0 [scalar]
+        Order of input sequence.
+
+    T : int >= 1 [scalar]
+        Number of frames.
+
+    Returns
+    -------
     recursive : bool [scalar]
+        True if the recursive algorithm is expected to be faster.
+
+    """
+
+    # Transforming T frames recursively costs O(mMT) operations, and so does
+    # the matrix multiplication, though much faster per operation. Building
+    # the (M + 1) x (m + 1) matrix is the recursion over m + 1 unit frames,
+    # i.e., O(m^2 M). The order M is a common factor of all the costs, so
+    # the recursion is preferred only for a few frames compared to m.
+    return T <= m + 1
+
+
+def freqt(C, M=24, alpha=0.42, recursive=None, dtype=np.float64):
+    """Perform frequency transform.
+
+    Parameters
+    ----------
+    C : array_like [shape=(m + 1,) or (m + 1, T)]
+        Minimum phase sequence.
+
+    M : int >= 0 [scalar]
+        Order of warped sequence.
+
+    alpha : float in (-1, 1) [scalar] or array-like [shape=(T,)]
+        Frequency warping factor, or that of each frame.
+
+    recursive : bool or None [scalar]
         If True, use recursive algorithm instead of matrix multiplication.
+        If None, select faster one according to the shape of input and the
+        number of unique frequency warping factors.
+
+    dtype : np.float32 or np.float64
+        Data type of computation and output.
 
     Returns
     -------
@@ -55,46 +226,34 @@ def freqt(C, M=24, alpha=0.42, recursive=True):
     if M < 0:
         raise ValueError('Order M must be a non-negative integer')
 
-    check_alpha(alpha)
-    beta = 1 - alpha * alpha
+    T = C.shape[1]
+    alpha = _check_alphas(alpha, T)
+
+    dtype = _check_dtype(dtype)
+
+    # Frames sharing a frequency warping factor share a transform matrix.
+    groups = _group_by_alpha(alpha)
+    if len(groups) == 1:
+        alpha = groups[0][0]
+
+    if recursive is None:
+        recursive = (
+            any(_freqt_key(m, M, a, dtype) not in plan_cache
+                for a, _ in groups) and
+            _use_recursive(m, T // len(groups)))
 
     if recursive:
-        L = M + 1
-        T = C.shape[1]
-        D = np.zeros((L, T))
-        G = np.zeros((L, T))
-        for i in range(m, -1, -1):
-            D[0] = G[0]
-            G[0] = C[i] + alpha * D[0]
-            if 1 < L:
-                D[1] = G[1]
-                G[1] = beta * D[0] + alpha * D[1]
-            for j in range(2, L):
-                D[j] = G[j]
-                G[j] = D[j - 1] + alpha * (D[j] - G[j - 1])
+        # All frames are transformed in one pass regardless of alpha.
+        C = np.ascontiguousarray(C, dtype=dtype)
+        G = _freqt_recursive(C, M, np.atleast_1d(alpha).astype(dtype))
+    elif len(groups) == 1:
+        C = C.astype(dtype, copy=False)
+        G = np.matmul(_freqt_matrix(m, M, alpha, dtype), C)
     else:
-        given_param = (m, M, alpha)
-        if 'param' not in dir(freqt) or freqt.param != given_param:
-            freqt.param = given_param
-            update = True
-        else:
-            update = False
-
-        if update:
-            L = M + 1
-            K = m + 1
-            freqt.A = np.zeros((L, K))
-            freqt.A[0, :] = alpha ** np.arange(K)
-            if 1 < L and 1 < K:
-                freqt.A[1, 1:] = (alpha ** np.arange(K - 1) * np.arange(1, K) *
-                                  beta)
-            for i in range(2, L):
-                i1 = i - 1
-                for j in range(1, K):
-                    j1 = j - 1
-                    freqt.A[i, j] = (freqt.A[i1, j1] +
-                                     alpha * (freqt.A[i, j1] - freqt.A[i1, j]))
-        G = np.matmul(freqt.A, C)
+        C = C.astype(dtype, copy=False)
+        G = np.empty((M + 1, T), dtype=dtype)
+        for a, idx in groups:
+            G[:, idx] = np.matmul(_freqt_matrix(m, M, a, dtype), C[:, idx])
 
     if is_vector_input:
         G = np.squeeze(G, axis=-1)
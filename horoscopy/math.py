@@ -4,61 +4,234 @@
 # Copyright (c) 2020 Takenori Yoshimura
 # Licensed under the MIT license
 
-from numba import jit
+import types
+
+import numba
+from numba import jit, prange
 import numpy as np
 
-from .utils import _asarray
+from .utils import _asarray, _check_dtype
 
 
-@jit('f8[:, :](f8[:, :, :], f8[:, :])', nopython=True)
-def _mv2d(m, v):
-    """Perform 2-D matrix-vector multiplication, dot-product.
-    """
-    ret = np.empty(v.shape)
-    ret[:, 0] = m[:, 0, 0] * v[:, 0] + m[:, 0, 1] * v[:, 1]
-    ret[:, 1] = m[:, 1, 0] * v[:, 0] + m[:, 1, 1] * v[:, 1]
-    return ret
+_MERCHANT_PARKS_SIGNATURE = [
+    'void(%s[:, :], %s[:, :], %s[:, :], %s[:, :], %s[:, :], %s[:, :], '
+    '%s[:, :, :])' % ((t,) * 7) for t in ('f8', 'f4')]
+
 
+@jit(_MERCHANT_PARKS_SIGNATURE, nopython=True, nogil=True, parallel=True,
+     error_model='numpy', cache=True)
+def _merchant_parks(t_c, t_r, h_c, h_r, b, a, work):
+    """Solve Toeplitz plus Hankel systems by Merchant-Parks algorithm.
 
-@jit('f8[:, :, :](f8[:, :, :], f8[:, :, :])', nopython=True)
-def _mm2d(m, n):
-    """Perform 2-D matrix-matrix mulciplication.
+    The 2x2 matrices are stored as flattened (00, 01, 10, 11) rows. The K
+    systems are split into as many blocks as work.shape[0], each of which is
+    solved by one thread sharing work[blk] among the systems in the block.
+    The solutions are written to a.
     """
-    ret = np.empty(m.shape)
-    ret[:, 0, 0] = m[:, 0, 0] * n[:, 0, 0] + m[:, 0, 1] * n[:, 1, 0]
-    ret[:, 0, 1] = m[:, 0, 0] * n[:, 0, 1] + m[:, 0, 1] * n[:, 1, 1]
-    ret[:, 1, 0] = m[:, 1, 0] * n[:, 0, 0] + m[:, 1, 1] * n[:, 1, 0]
-    ret[:, 1, 1] = m[:, 1, 0] * n[:, 0, 1] + m[:, 1, 1] * n[:, 1, 1]
-    return ret
+    N, K = b.shape
+    n_blocks = work.shape[0]
+    s = 1 if N % 2 == 0 else 0
+    size = (K + n_blocks - 1) // n_blocks
+    for blk in prange(n_blocks):
+        R = work[blk, :, 0:4]
+        X = work[blk, :, 4:8]
+        p = work[blk, :, 8:10]
+        for k in range(blk * size, min(K, (blk + 1) * size)):
+            # Step 1:
+            # Set R with coefficients modification.
+            d0 = t_c[0, k]
+            for i in range(N):
+                R[i, 0] = t_c[i, k]
+                R[i, 1] = h_c[i, k]
+                R[i, 2] = h_r[N - 1 - i, k]
+                R[i, 3] = t_r[i, k]
+                if i % 2 == 0:
+                    R[i, 0] += d0
+                    R[i, 3] += d0
+                if i % 2 == s:
+                    R[i, 1] -= d0
+                    R[i, 2] -= d0
+
+            # Set X_0.
+            X[0, 0] = 1
+            X[0, 1] = 0
+            X[0, 2] = 0
+            X[0, 3] = 1
+
+            # Set p_0.
+            b0 = b[0, k]
+            b1 = b[N - 1, k]
+            z = 1 / (R[0, 0] * R[0, 3] - R[0, 1] * R[0, 2])
+            p[0, 0] = z * (R[0, 3] * b0 - R[0, 1] * b1)
+            p[0, 1] = z * (R[0, 0] * b1 - R[0, 2] * b0)
+
+            # Set V_x.
+            v0 = R[0, 0]
+            v1 = R[0, 1]
+            v2 = R[0, 2]
+            v3 = R[0, 3]
+
+            # Step 2:
+            for i in range(1, N):
+                # a: Calculate E_x.
+                # b: Calculate e_p.
+                e0 = e1 = e2 = e3 = 0.0
+                f0 = f1 = 0.0
+                for j in range(i):
+                    r0 = R[i - j, 0]
+                    r1 = R[i - j, 1]
+                    r2 = R[i - j, 2]
+                    r3 = R[i - j, 3]
+                    e0 += r0 * X[j, 0] + r1 * X[j, 2]
+                    e1 += r0 * X[j, 1] + r1 * X[j, 3]
+                    e2 += r2 * X[j, 0] + r3 * X[j, 2]
+                    e3 += r2 * X[j, 1] + r3 * X[j, 3]
+                    f0 += r0 * p[j, 0] + r1 * p[j, 1]
+                    f1 += r2 * p[j, 0] + r3 * p[j, 1]
+
+                # c: Calculate B_x = inv(ct(V_x)) E_x.
+                z = 1 / (v0 * v3 - v1 * v2)
+                u0 = z * v0
+                u1 = -z * v2
+                u2 = -z * v1
+                u3 = z * v3
+                c0 = u0 * e0 + u1 * e2
+                c1 = u0 * e1 + u1 * e3
+                c2 = u2 * e0 + u3 * e2
+                c3 = u2 * e1 + u3 * e3
+
+                # d: Update X and V_x. X[j] and X[i - j] are updated in pairs
+                # so that the old values are used without a copy of X.
+                for j in range(1, i // 2 + 1):
+                    jj = i - j
+                    x0 = X[j, 0]
+                    x1 = X[j, 1]
+                    x2 = X[j, 2]
+                    x3 = X[j, 3]
+                    y0 = X[jj, 0]
+                    y1 = X[jj, 1]
+                    y2 = X[jj, 2]
+                    y3 = X[jj, 3]
+                    X[j, 0] = x0 - (y3 * c0 + y2 * c2)
+                    X[j, 1] = x1 - (y3 * c1 + y2 * c3)
+                    X[j, 2] = x2 - (y1 * c0 + y0 * c2)
+                    X[j, 3] = x3 - (y1 * c1 + y0 * c3)
+                    if j != jj:
+                        X[jj, 0] = y0 - (x3 * c0 + x2 * c2)
+                        X[jj, 1] = y1 - (x3 * c1 + x2 * c3)
+                        X[jj, 2] = y2 - (x1 * c0 + x0 * c2)
+                        X[jj, 3] = y3 - (x1 * c1 + x0 * c3)
+                X[i, 0] = -c0
+                X[i, 1] = -c1
+                X[i, 2] = -c2
+                X[i, 3] = -c3
+                v0 -= e3 * c0 + e2 * c2
+                v1 -= e3 * c1 + e2 * c3
+                v2 -= e1 * c0 + e0 * c2
+                v3 -= e1 * c1 + e0 * c3
+
+                # e: Calculate g = inv(ct(V_x)) (b_bar - e_p).
+                b0 = b[i, k] - f0
+                b1 = b[N - 1 - i, k] - f1
+                z = 1 / (v0 * v3 - v1 * v2)
+                g0 = z * (v0 * b0 - v2 * b1)
+                g1 = z * (v3 * b1 - v1 * b0)
+
+                # f: Update p.
+                for j in range(i):
+                    x0 = X[i - j, 0]
+                    x1 = X[i - j, 1]
+                    x2 = X[i - j, 2]
+                    x3 = X[i - j, 3]
+                    p[j, 0] += x3 * g0 + x2 * g1
+                    p[j, 1] += x1 * g0 + x0 * g1
+                p[i, 0] = g0
+                p[i, 1] = g1
+
+            # Step 3:
+            # Extract solution vector.
+            for i in range(N):
+                a[i, k] = p[i, 0]
+
+
+def _copy_function(func, name):
+    """Copy a Python function under another name.
+
+    The on-disk cache of numba is located by the qualified name of a
+    function, so two dispatchers of the same function need different names.
+    """
+    f = types.FunctionType(func.__code__, func.__globals__, name,
+                           func.__defaults__, func.__closure__)
+    f.__qualname__ = name
+    return f
 
 
-@jit('f8[:, :, :](f8[:, :, :])', nopython=True)
-def _inv2d(x):
-    """Perform 2-D matrix inversion.
-    """
-    y = np.empty(x.shape)
-    y[:, 0, 0] = x[:, 1, 1]
-    y[:, 0, 1] = -x[:, 0, 1]
-    y[:, 1, 0] = -x[:, 1, 0]
-    y[:, 1, 1] = x[:, 0, 0]
-    y *= np.reshape(np.reciprocal(
-        x[:, 0, 0] * x[:, 1, 1] - x[:, 0, 1] * x[:, 1, 0]), (-1, 1, 1))
-    return y
-
-
-@jit('f8[:, :, :](f8[:, :, :])', nopython=True)
-def _ct2d(x):
-    """Perform 2-D cross transpose.
+# Single-threaded variant, which can be called from many threads at once
+# regardless of the threading layer of numba.
+_merchant_parks_serial = jit(
+    _MERCHANT_PARKS_SIGNATURE, nopython=True, nogil=True,
+    error_model='numpy', cache=True)(
+        _copy_function(_merchant_parks.py_func, '_merchant_parks_serial'))
+
+
+def _solve_dense(t_c, t_r, h_c, h_r, b):
+    """Solve Toeplitz plus Hankel systems by LU decomposition.
     """
-    y = np.empty(x.shape)
-    y[:, 0, 0] = x[:, 1, 1]
-    y[:, 0, 1] = x[:, 1, 0]
-    y[:, 1, 0] = x[:, 0, 1]
-    y[:, 1, 1] = x[:, 0, 0]
-    return y
+    N, K = b.shape
+    i = np.arange(N)
+    d = np.subtract.outer(i, i)
+    s = np.add.outer(i, i)
+    A = np.where(np.expand_dims(0 <= d, axis=-1),
+                 t_c[np.abs(d)], t_r[np.abs(d)])
+    A += np.where(np.expand_dims(s < N, axis=-1),
+                  h_r[np.minimum(s, N - 1)], h_c[np.maximum(s - N + 1, 0)])
+    A = np.moveaxis(A, -1, 0)
+    try:
+        x = np.linalg.solve(A, np.expand_dims(b.T, axis=-1))
+        return np.squeeze(x, axis=-1).T
+    except np.linalg.LinAlgError:
+        pass
+
+    # Some of the systems are singular. They are solved in the sense of
+    # least squares one by one, while the others are still solved exactly.
+    x = np.empty((N, K), dtype=b.dtype)
+    for k in range(K):
+        try:
+            x[:, k] = np.linalg.solve(A[k], b[:, k])
+        except np.linalg.LinAlgError:
+            x[:, k] = np.linalg.lstsq(A[k], b[:, k], rcond=None)[0]
+    return x
+
+
+def _fix_breakdown(t_c, t_r, h_c, h_r, b, a):
+    """Solve systems where the recursion broke down directly.
 
+    Parameters
+    ----------
+    t_c, t_r, h_c, h_r, b : np.ndarray [shape=(N, K)]
+        Inputs of the recursion.
 
-def solve_toeplitz_plus_hankel(t, h, b):
+    a : np.ndarray [shape=(N, K)]
+        Solutions of the recursion, which are updated in place.
+
+    """
+
+    # The recursion breaks down if a leading submatrix is singular even
+    # though the whole matrix is not. Such systems are solved directly.
+    # Systems of non-finite inputs have no solution and are left as they
+    # are.
+    broken = ~np.all(np.isfinite(a), axis=0)
+    if np.any(broken):
+        broken &= np.all(np.isfinite(t_c) & np.isfinite(t_r) &
+                         np.isfinite(h_c) & np.isfinite(h_r) &
+                         np.isfinite(b), axis=0)
+    if np.any(broken):
+        a[:, broken] = _solve_dense(t_c[:, broken], t_r[:, broken],
+                                    h_c[:, broken], h_r[:, broken],
+                                    b[:, broken])
+
+
+def solve_toeplitz_plus_hankel(t, h, b, parallel=True, dtype=np.float64):
     """Solve a Toeplitz plus Hankel system.
 
     Parameters
@@ -67,15 +240,25 @@ def solve_toeplitz_plus_hankel(t, h, b):
         First column(s) and first row(s) of the Toeplitz matrix.
 
     h : (array-like, array_like)
-        First column(s) and last row(s) of the Hankel matrix.
+        Last row(s) and first column(s) of the Hankel matrix.
 
     b : array-like [shape=(N,) or (N, K)]
         Constant vector(s). Right-hand side in ``(T + H) x = b``.
 
+    parallel : bool [scalar]
+        If True, the systems are solved by the threads of numba. Otherwise,
+        they are solved in the calling thread, which is preferable when
+        this function is called from many threads at once.
+
+    dtype : np.float32 or np.float64
+        Data type of computation and output. In single precision, inner
+        products are still accumulated in double precision.
+
     Returns
     -------
     a : np.ndarray [shape=(N,) or (N, K)]
-        Solution of the Toeplitz plus Hankel system.
+        Solution of the Toeplitz plus Hankel system. If the system is
+        singular, the least-squares solution of minimum norm is returned.
 
     References
     ----------
@@ -86,7 +269,6 @@ def solve_toeplitz_plus_hankel(t, h, b):
 
     """
 
-
     b = _asarray(b)
     if b.ndim == 1:
         is_vector_input = True
@@ -115,78 +297,23 @@ def solve_toeplitz_plus_hankel(t, h, b):
         (not is_vector_input and (h_c.ndim != 2 or h_r.ndim != 2))):
         raise ValueError('Dimension mismatch h vs b')
 
-    # Step 1:
-    if 1:
-        # Set R.
-        R = np.empty((N, K, 2, 2))
-        R[:, :, 0, 0] = t_c
-        R[:, :, 1, 1] = t_r
-        R[:, :, 0, 1] = h_c
-        R[:, :, 1, 0] = h_r[::-1]
-
-        # Apply coefficients modification.
-        s = 1 if N % 2 == 0 else 0
-        d0 = t_c[0]
-        R[::2, :, 0, 0] += d0
-        R[::2, :, 1, 1] += d0
-        R[s::2, :, 0, 1] -= d0
-        R[s::2, :, 1, 0] -= d0
-
-        # Set X_0.
-        X = np.empty((N, K, 2, 2))
-        X[0, :, 0, 0] = 1
-        X[0, :, 1, 1] = 1
-        X[0, :, 0, 1] = 0
-        X[0, :, 1, 0] = 0
-        prev_X = np.empty((N, K, 2, 2))
-
-        # Set p_0.
-        b_bar = np.empty((K, 2))
-        b_bar[:, 0] = b[0]
-        b_bar[:, 1] = b[N - 1]
-        p = np.empty((N, K, 2))
-        p[0] = _mv2d(_inv2d(R[0]), b_bar)
-
-        # Set V_x.
-        V_x = np.copy(R[0])
-
-    # Step 2:
-    for i in range(1, N):
-        # a: Calculate E_x.
-        E_x = np.zeros((K, 2, 2))
-        for j in range(i):
-            E_x += _mm2d(R[i - j], X[j])
-
-        # b: Calculate e_p.
-        e_p = np.zeros((K, 2))
-        for j in range(i):
-            e_p += _mv2d(R[i - j], p[j])
-
-        # c: Calculate B_x.
-        B_x = _mm2d(_inv2d(_ct2d(V_x)), E_x)
-
-        # d: Update X and V_x.
-        for j in range(1, i):
-            X[j] -= _mm2d(_ct2d(prev_X[i - j]), B_x)
-        X[i] = -B_x
-        prev_X[1:i + 1] = X[1:i + 1]
-        V_x -= _mm2d(_ct2d(E_x), B_x)
-
-        # e: Calculate g.
-        b_bar[:, 0] = b[i]
-        b_bar[:, 1] = b[N - 1 - i]
-        g = _mv2d(_inv2d(_ct2d(V_x)), b_bar - e_p)
-
-        # f: Update p.
-        for j in range(i):
-            p[j] += _mv2d(_ct2d(X[i - j]), g)
-        p[i] = g
-
-    # Step 3:
-    if 1:
-        # Extract solution vector.
-        a = p[:, :, 0]
-        if is_vector_input:
-            a = np.squeeze(a, axis=-1)
+    dtype = _check_dtype(dtype)
+    t_c, t_r, h_c, h_r, b = [
+        np.ascontiguousarray(np.reshape(x, (N, K)), dtype=dtype)
+        for x in (t_c, t_r, h_c, h_r, b)]
+
+    a = np.empty((N, K), dtype=dtype)
+    if parallel:
+        n_blocks = max(1, min(K, 4 * numba.get_num_threads()))
+        work = np.empty((n_blocks, N, 10), dtype=dtype)
+        _merchant_parks(t_c, t_r, h_c, h_r, b, a, work)
+    else:
+        work = np.empty((1, N, 10), dtype=dtype)
+        _merchant_parks_serial(t_c, t_r, h_c, h_r, b, a, work)
+
+    _fix_breakdown(t_c, t_r, h_c, h_r, b, a)
+
+    if is_vector_input:
+        a = np.squeeze(a, axis=-1)
 
     return a
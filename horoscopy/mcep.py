@@ -4,17 +4,816 @@
 # Copyright (c) 2020 Takenori Yoshimura
 # Licensed under the MIT license
 
-import sys
+from concurrent.futures import ThreadPoolExecutor
+import os
 
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 from scipy.fft import rfft, irfft
 
-from .freqt import freqt
+from .cache import _digest, plan_cache
+from .freqt import (_freqt_matrix, _freqt_recursive, _freqt_recursive_serial,
+                    _freqt_transposed, _freqt_transposed_serial, freqt)
 from .math import solve_toeplitz_plus_hankel
-from .utils import _asarray, check_alpha, sr_to_alpha
+from .profiler import _record_frames, _record_iteration, _stage
+from .utils import (_asarray, _check_alphas, _check_dtype, _group_by_alpha,
+                    _take_alphas, check_alpha, sr_to_alpha)
+from .version import __version__
+from .window import _get_cached_window
 
 
-def stft_to_mcep(S, M=24, alpha=0.42, n_iter=10, tol=1e-4, eps=0, sr=None):
+# Lower bound of log periodogram of frames taking fast path.
+_LOG_TINY = {np.dtype(t): np.log(np.finfo(t).tiny)
+             for t in (np.float32, np.float64)}
+
+# Number of frames transformed at once in waveform analysis.
+_FFT_BLOCK = 128
+
+# Number of frames processed at once by a thread.
+_JOB_BLOCK = 256
+
+# Peak working memory of stft_to_mcep per frame and per FFT bin in bytes.
+_BYTES_PER_BIN = 48
+
+
+def _newton(log_I, mc, alpha, n_iter, tol, warm=False, parallel=True):
+    """Refine mel-cepstral coefficients by Newton-Raphson method.
+
+    Parameters
+    ----------
+    log_I : np.ndarray [shape=(1 + n_fft / 2, T)]
+        Log periodogram.
+
+    mc : np.ndarray [shape=(M + 1, T)]
+        Initial mel-cepstral coefficients, which are updated in place.
+
+    alpha : float in (-1, 1) [scalar] or np.ndarray [shape=(T,)]
+        Frequency warping factor, or that of each frame.
+
+    n_iter : int >= 0 [scalar]
+        Maximum number of iterations.
+
+    tol : float >= 0 [scalar]
+        Relative tolerance.
+
+    warm : bool [scalar]
+        If True, the initial coefficients are assumed to be warm-started.
+        Since epsilon may then increase toward the optimum, convergence is
+        checked by the absolute value of its relative change.
+
+    parallel : bool [scalar]
+        If False, the solver runs in the calling thread only.
+
+    Returns
+    -------
+    n : np.ndarray [shape=(T,)]
+        Number of iterations performed on each frame.
+
+    diverged : np.ndarray [shape=(T,)]
+        True if the coefficients of the frame became non-finite, or its
+        epsilon was still increasing when the maximum number of iterations
+        was reached.
+
+    """
+
+    h_fft, T = log_I.shape[0] - 1, log_I.shape[1]
+    n_fft = 2 * h_fft
+    M = mc.shape[0] - 1
+    L = M + 1
+
+    # Get matrix of coefficients frequency transform, which is the transpose
+    # of the frequency transform matrix of the opposite warping. If frames
+    # have their own alphas, the transforms are instead performed frame by
+    # frame by the recursions, which need no matrix.
+    dtype = log_I.dtype
+    per_frame = np.ndim(alpha) != 0
+    if per_frame:
+        neg_alpha = (-alpha).astype(dtype)
+        if parallel:
+            warp, unwarp = _freqt_recursive, _freqt_transposed
+        else:
+            warp, unwarp = _freqt_recursive_serial, _freqt_transposed_serial
+    else:
+        A = _freqt_matrix(2 * M, h_fft, -alpha, dtype).T
+
+    # Compute (-a)^0, (-a)^1, (-a)^2, ..., (-a)^M.
+    a = np.power.outer(-np.atleast_1d(alpha), np.arange(L)).T.astype(dtype)
+
+    # Converged frames are removed from the working set so that later
+    # iterations are performed only on the frames still being refined.
+    n = np.zeros(T, dtype=np.int64)
+    active = np.arange(T)
+    log_I_a = log_I
+    mc_a = mc
+    prev_epsilon = np.full(T, np.inf, dtype=dtype)
+    rising = np.zeros(T, dtype=bool)
+    retry = np.zeros(T, dtype=bool)
+    step = np.zeros_like(mc)
+    for i in range(n_iter):
+        with _stage('mcep_to_stft'):
+            if per_frame:
+                log_D = rfft(warp(mc_a, h_fft, neg_alpha), n=n_fft,
+                             axis=0).real
+            else:
+                log_D = mcep_to_stft(mc_a, n_fft=n_fft, alpha=alpha,
+                                     log=True, dtype=dtype)
+            log_D *= -2
+            log_D += log_I_a
+
+        with _stage('irfft'), np.errstate(over='ignore', invalid='ignore'):
+            r = irfft(np.exp(log_D, out=log_D), axis=0)[:h_fft + 1]
+        with _stage('freqt'), np.errstate(invalid='ignore'):
+            r_t = unwarp(r, 2 * M, neg_alpha) if per_frame else np.matmul(A, r)
+        epsilon = r_t[0]
+
+        # A step overshooting so far that the exponential overflows, or that
+        # more than doubles epsilon from a cold start, is halved and the
+        # frame is evaluated again in the next iteration. Smaller increases
+        # are left to the convergence check as before. The first iteration
+        # has no step to take back.
+        if 0 < i:
+            retry = ~np.isfinite(epsilon)
+            if not warm:
+                with np.errstate(invalid='ignore'):
+                    retry |= 2 * prev_epsilon < epsilon
+        if np.any(retry):
+            step[:, retry] *= 0.5
+            mc_a[:, retry] -= step[:, retry]
+            epsilon[retry] = prev_epsilon[retry]
+            update = ~retry
+            r_u = r_t[:, update]
+            a_u = a[:, update] if per_frame else a
+        else:
+            update = slice(None)
+            r_u = r_t
+            a_u = a
+
+        # Update mel-cepstral coefficients.
+        t = (r_u[:L], r_u[:L])
+        h = (r_u[M:], r_u[:L])
+        b = r_u[:L] - a_u
+        with _stage('solve'):
+            grad = solve_toeplitz_plus_hankel(t, h, b, parallel=parallel,
+                                              dtype=dtype)
+        mc_a[:, update] += grad
+        step[:, update] = grad
+        n[active] += 1
+
+        # Check convergence of each frame.
+        relative_change = (prev_epsilon - epsilon) / epsilon
+        rising = relative_change < 0
+        if warm:
+            relative_change = np.abs(relative_change)
+        keep = (tol <= relative_change) | retry
+        _record_iteration(i, epsilon, keep.size - np.count_nonzero(keep))
+        if np.all(keep):
+            prev_epsilon = epsilon
+            continue
+
+        mc[:, active] = mc_a
+        active = active[keep]
+        rising = rising[keep]
+        retry = retry[keep]
+        if active.size == 0:
+            break
+        log_I_a = log_I_a[:, keep]
+        mc_a = mc_a[:, keep]
+        step = step[:, keep]
+        prev_epsilon = epsilon[keep]
+        if per_frame:
+            neg_alpha = neg_alpha[keep]
+            a = a[:, keep]
+    else:
+        mc[:, active] = mc_a
+
+    # Frames still approaching the optimum slowly are not regarded as
+    # diverged, since recomputing them would cost more iterations.
+    diverged = ~np.all(np.isfinite(mc), axis=0)
+    diverged[active[rising | retry]] = True
+    return n, diverged
+
+
+def _warm_newton(log_I, mc, mc_cold, alpha, n_iter, tol, parallel=True):
+    """Refine warm-started mel-cepstral coefficients with fallback.
+
+    Parameters
+    ----------
+    log_I : np.ndarray [shape=(1 + n_fft / 2, T)]
+        Log periodogram.
+
+    mc : np.ndarray [shape=(M + 1, T)]
+        Warm-start mel-cepstral coefficients, which are updated in place.
+
+    mc_cold : np.ndarray [shape=(M + 1, T)]
+        Cold-start mel-cepstral coefficients used if warm start diverges.
+
+    alpha : float in (-1, 1) [scalar] or np.ndarray [shape=(T,)]
+        Frequency warping factor, or that of each frame.
+
+    n_iter : int >= 0 [scalar]
+        Maximum number of iterations.
+
+    tol : float >= 0 [scalar]
+        Relative tolerance.
+
+    Returns
+    -------
+    n : np.ndarray [shape=(T,)]
+        Number of iterations performed on each frame including those of
+        the fallback.
+
+    """
+
+    with np.errstate(over='ignore', invalid='ignore'):
+        n, diverged = _newton(log_I, mc, alpha, n_iter, tol, warm=True,
+                              parallel=parallel)
+    if np.any(diverged):
+        mc_fb = mc_cold[:, diverged]
+        n_fb, _ = _newton(log_I[:, diverged], mc_fb,
+                          _take_alphas(alpha, diverged), n_iter, tol,
+                          parallel=parallel)
+        mc[:, diverged] = mc_fb
+        n[diverged] += n_fb
+    return n
+
+
+def _refine(log_I, mc, alpha, n_iter, tol, init, parallel=True):
+    """Refine mel-cepstral coefficients from given initialization.
+
+    Parameters
+    ----------
+    log_I : np.ndarray [shape=(1 + n_fft / 2, T)]
+        Log periodogram.
+
+    mc : np.ndarray [shape=(M + 1, T)]
+        Cold-start mel-cepstral coefficients, which are updated in place.
+
+    alpha : float in (-1, 1) [scalar] or np.ndarray [shape=(T,)]
+        Frequency warping factor, or that of each frame.
+
+    n_iter : int >= 0 [scalar]
+        Maximum number of iterations.
+
+    tol : float >= 0 [scalar]
+        Relative tolerance.
+
+    init : None, 'previous', or np.ndarray [shape=(M + 1, 1) or (M + 1, T)]
+        Initialization of the iterations.
+
+    Returns
+    -------
+    n : np.ndarray [shape=(T,)]
+        Number of iterations performed on each frame.
+
+    """
+
+    if init is None:
+        n, _ = _newton(log_I, mc, alpha, n_iter, tol, parallel=parallel)
+    elif isinstance(init, str):
+        # Even frames are cold-started, and then each odd frame is seeded
+        # from the converged preceding frame. This keeps both passes
+        # vectorized over frames. The seed is shifted by the difference of
+        # the initial guesses to follow the change of spectral envelope,
+        # in particular of the gain, between the two frames.
+        T = mc.shape[1]
+        n = np.empty(T, dtype=np.int64)
+        mc_cold = mc.copy()
+        even, odd = slice(0, None, 2), slice(1, None, 2)
+        n[even], _ = _newton(log_I[:, even], mc[:, even],
+                             _take_alphas(alpha, even), n_iter, tol,
+                             parallel=parallel)
+        if 1 < T:
+            prev = slice(0, T - 1, 2)
+            mc[:, odd] += mc[:, prev] - mc_cold[:, prev]
+            n[odd] = _warm_newton(log_I[:, odd], mc[:, odd], mc_cold[:, odd],
+                                  _take_alphas(alpha, odd), n_iter, tol,
+                                  parallel=parallel)
+    else:
+        mc_cold = mc.copy()
+        mc[:] = init
+        n = _warm_newton(log_I, mc, mc_cold, alpha, n_iter, tol,
+                         parallel=parallel)
+
+    return n
+
+
+def _find_fast_frames(log_I, energy_threshold, flatness_threshold):
+    """Find silent or noise-like frames.
+
+    Parameters
+    ----------
+    log_I : np.ndarray [shape=(1 + n_fft / 2, T)]
+        Log periodogram.
+
+    energy_threshold : float >= 0 [scalar] or None
+        Frames whose mean power is below this value are found.
+
+    flatness_threshold : float in [0, 1] [scalar] or None
+        Frames whose spectral flatness is above this value are found.
+
+    Returns
+    -------
+    fast : np.ndarray [shape=(T,)]
+        True if the frame is silent or noise-like.
+
+    """
+
+    power = np.mean(np.exp(log_I), axis=0)
+    fast = np.zeros(log_I.shape[1], dtype=bool)
+    if energy_threshold is not None:
+        fast |= power < energy_threshold
+    if flatness_threshold is not None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            flatness = np.exp(np.mean(log_I, axis=0)) / power
+        fast |= flatness_threshold < flatness
+    return fast
+
+
+def _log_periodogram(S, eps, fast_path, dtype=np.float64):
+    """Compute log periodogram from magnitude spectrogram.
+
+    Parameters
+    ----------
+    S : np.ndarray [shape=(1 + n_fft / 2, T)]
+        Linear magnitude spectrogram.
+
+    eps : float >= 0 [scalar]
+        A very small value added to S.
+
+    fast_path : bool [scalar]
+        If True, warnings on zero magnitude are suppressed because such
+        frames are handled by fast path.
+
+    dtype : np.dtype
+        Data type of the output.
+
+    Returns
+    -------
+    log_I : np.ndarray [shape=(1 + n_fft / 2, T)]
+        Log periodogram.
+
+    """
+
+    with np.errstate(divide='ignore' if fast_path else None):
+        S = S.astype(dtype, copy=False)
+        return 2 * np.log(S + np.dtype(dtype).type(eps) if eps > 0 else S)
+
+
+def _frame(y, frame_length, hop_length):
+    """Slice a signal into overlapping frames without copy.
+
+    Parameters
+    ----------
+    y : np.ndarray [shape=(N,)]
+        Contiguous input signal.
+
+    frame_length : int > 0 [scalar]
+        Length of frame.
+
+    hop_length : int > 0 [scalar]
+        Number of samples between adjacent frames.
+
+    Returns
+    -------
+    frames : np.ndarray [shape=(T, frame_length)]
+        Read-only view of frames, where T = 1 + (N - frame_length) //
+        hop_length.
+
+    """
+
+    T = max(0, 1 + (len(y) - frame_length) // hop_length)
+    return as_strided(y, shape=(T, frame_length),
+                      strides=(y.strides[0] * hop_length, y.strides[0]),
+                      writeable=False)
+
+
+def _frames_to_log_periodogram(frames, window, n_fft, eps, fast_path,
+                               dtype=np.float64):
+    """Compute log periodogram from waveform frames.
+
+    Parameters
+    ----------
+    frames : np.ndarray [shape=(T, win_length)]
+        Waveform frames.
+
+    window : np.ndarray [shape=(win_length,)]
+        Window function.
+
+    n_fft : int > 0 [scalar]
+        Number of FFT bins. Frames are padded with zeros to this length.
+
+    eps : float >= 0 [scalar]
+        A very small value added to magnitude spectrum.
+
+    fast_path : bool [scalar]
+        If True, warnings on zero power are suppressed.
+
+    dtype : np.dtype
+        Data type of computation and output.
+
+    Returns
+    -------
+    log_I : np.ndarray [shape=(1 + n_fft / 2, T)]
+        Log periodogram.
+
+    Notes
+    -----
+    The position of the frame in the FFT buffer only affects the phase, so
+    frames are not centered as in :func:`librosa.stft`.
+
+    """
+
+    # Frames are transformed block by block so that the buffers stay in
+    # cache.
+    T, win_length = frames.shape
+    log_I = np.empty((n_fft // 2 + 1, T), dtype=dtype)
+    buf = np.zeros((min(T, _FFT_BLOCK), n_fft), dtype=dtype)
+    with np.errstate(divide='ignore' if fast_path else None):
+        for s in range(0, T, _FFT_BLOCK):
+            e = min(s + _FFT_BLOCK, T)
+            x = buf[:e - s]
+            np.multiply(frames[s:e], window, out=x[:, :win_length])
+            X = rfft(x, axis=-1)
+            P = np.square(X.real)
+            P += np.square(X.imag)
+            if eps > 0:
+                np.sqrt(P, out=P)
+                P += np.dtype(dtype).type(eps)
+            np.log(P.T, out=log_I[:, s:e])
+    if eps > 0:
+        log_I *= 2
+    return log_I
+
+
+def _analyze(log_I, M, alpha, n_iter, tol, init, energy_threshold,
+             flatness_threshold, parallel=True):
+    """Calculate mel-cepstral coefficients from a block of log periodogram.
+
+    Parameters
+    ----------
+    log_I : np.ndarray [shape=(1 + n_fft / 2, T)]
+        Log periodogram.
+
+    Returns
+    -------
+    mc : np.ndarray [shape=(M + 1, T)]
+        M-th order mel-cesptral coefficients.
+
+    n : np.ndarray [shape=(T,)]
+        Number of iterations performed on each frame.
+
+    fast : np.ndarray [shape=(T,)]
+        True if the frame took fast path.
+
+    See also
+    --------
+    stft_to_mcep : Description of the other parameters.
+
+    """
+
+    h_fft = log_I.shape[0] - 1
+
+    # Find frames taking fast path.
+    T = log_I.shape[1]
+    if energy_threshold is None and flatness_threshold is None:
+        fast = np.zeros(T, dtype=bool)
+    else:
+        fast = _find_fast_frames(log_I, energy_threshold, flatness_threshold)
+        if np.any(fast):
+            log_I[:, fast] = np.maximum(log_I[:, fast],
+                                        _LOG_TINY[log_I.dtype])
+
+    # Make initial guess.
+    with _stage('initial_guess'):
+        c = irfft(log_I, axis=0)[:h_fft + 1]
+        c[(0, -1), :] *= 0.5
+        if np.ndim(alpha) == 0:
+            mc = freqt(c, M=M, alpha=alpha, recursive=False,
+                       dtype=log_I.dtype)
+        else:
+            warp = _freqt_recursive if parallel else _freqt_recursive_serial
+            mc = warp(c, M, alpha.astype(log_I.dtype))
+
+    # Perform Newton-Raphson method except for frames taking fast path.
+    with _stage('newton'):
+        if np.any(fast):
+            n = np.zeros(T, dtype=np.int64)
+            slow = ~fast
+            if np.any(slow):
+                mc_s = mc[:, slow]
+                if init is not None and not isinstance(init, str):
+                    init = init[:, slow] if 1 < init.shape[1] else init
+                n[slow] = _refine(log_I[:, slow], mc_s,
+                                  _take_alphas(alpha, slow), n_iter, tol,
+                                  init, parallel=parallel)
+                mc[:, slow] = mc_s
+        else:
+            n = _refine(log_I, mc, alpha, n_iter, tol, init,
+                        parallel=parallel)
+
+    _record_frames(n, fast)
+    return mc, n, fast
+
+
+def _block_size(T, n_fft, max_frames, memory_limit, even):
+    """Compute number of frames processed at once.
+
+    Parameters
+    ----------
+    T : int >= 0 [scalar]
+        Number of frames.
+
+    n_fft : int > 0 [scalar]
+        Number of FFT bins.
+
+    max_frames : int > 0 [scalar] or None
+        Maximum number of frames.
+
+    memory_limit : int > 0 [scalar] or None
+        Approximate upper bound of working memory in bytes.
+
+    even : bool [scalar]
+        If True, the number of frames is made even.
+
+    Returns
+    -------
+    B : int > 0 [scalar]
+        Number of frames in a block.
+
+    """
+
+    B = max(1, T)
+    if max_frames is not None:
+        B = min(B, max_frames)
+    if memory_limit is not None:
+        B = min(B, memory_limit // (_BYTES_PER_BIN * n_fft))
+    if even:
+        B = max(2, B - B % 2)
+    return max(1, B)
+
+
+def _check_params(M, alpha, n_iter, tol, eps, sr, init, energy_threshold,
+                  flatness_threshold, max_frames, memory_limit, n_jobs,
+                  dtype):
+    """Check parameters of mel-cepstral analysis.
+
+    Returns
+    -------
+    init : None, 'previous', or np.ndarray [shape=(M + 1, 1) or (M + 1, T)]
+        Validated initialization.
+
+    alpha : float in (-1, 1) [scalar] or np.ndarray [shape=(T,)]
+        Validated frequency warping factor(s).
+
+    dtype : np.dtype
+        Validated data type.
+
+    See also
+    --------
+    stft_to_mcep : Description of the parameters.
+
+    """
+
+    if M < 0:
+        raise ValueError('Order M must be a non-negative integer')
+
+    if n_iter < 0:
+        raise ValueError('Number of iterations must be a non-negative integer')
+
+    if tol < 0:
+        raise ValueError('Relative tolerance must be a non-negative number')
+
+    if eps < 0:
+        raise ValueError('Value eps must be a non-negative number')
+
+    if energy_threshold is not None and energy_threshold < 0:
+        raise ValueError('Energy threshold must be a non-negative number')
+
+    if flatness_threshold is not None and not 0 <= flatness_threshold <= 1:
+        raise ValueError('Flatness threshold must be in [0, 1]')
+
+    if max_frames is not None and max_frames <= 0:
+        raise ValueError('Maximum number of frames must be a positive integer')
+
+    if memory_limit is not None and memory_limit <= 0:
+        raise ValueError('Memory limit must be a positive integer')
+
+    if n_jobs is not None and n_jobs <= 0 and n_jobs != -1:
+        raise ValueError('Number of jobs must be a positive integer or -1')
+
+    if isinstance(init, str):
+        if init != 'previous':
+            raise ValueError('Unexpected initialization: ' + init)
+    elif init is not None:
+        init = _asarray(init)
+        if init.shape[0] != M + 1:
+            raise ValueError('init.shape[0] must be equal to M + 1')
+        if init.ndim == 1:
+            init = np.expand_dims(init, axis=-1)
+
+    if sr is not None:
+        alpha = sr_to_alpha(sr, refine=True)
+
+    alpha = _check_alphas(alpha)
+
+    dtype = _check_dtype(dtype)
+
+    return init, alpha, dtype
+
+
+def _analyze_blocks(log_periodogram, T, n_fft, M, alpha, n_iter, tol, init,
+                    energy_threshold, flatness_threshold, max_frames,
+                    memory_limit, n_jobs, dtype=np.float64):
+    """Calculate mel-cepstral coefficients block by block.
+
+    Parameters
+    ----------
+    log_periodogram : callable
+        Function that takes the first and last frame indices (s, e) and
+        returns the log periodogram of frames s to e - 1.
+
+    T : int >= 0 [scalar]
+        Number of frames.
+
+    n_fft : int > 1 [scalar]
+        Number of FFT bins.
+
+    Returns
+    -------
+    mc : np.ndarray [shape=(M + 1, T)]
+        M-th order mel-cesptral coefficients.
+
+    n : np.ndarray [shape=(T,)]
+        Number of iterations performed on each frame.
+
+    fast : np.ndarray [shape=(T,)]
+        True if the frame took fast path.
+
+    See also
+    --------
+    stft_to_mcep : Description of the other parameters.
+
+    """
+
+    # Process frames block by block to bound peak memory. Frames are
+    # independent of each other, so blocking only affects rounding errors.
+    # If threads are used, the blocks do not depend on the number of threads
+    # so that neither do the results.
+    B = _block_size(T, n_fft, max_frames, memory_limit,
+                    isinstance(init, str))
+    if n_jobs is not None:
+        B = min(B, _JOB_BLOCK)
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+        # Build transforms in advance so that the parallel kernels of numba
+        # are not called from the workers, nor from threads of the caller
+        # running the serial solver, e.g., those of the analysis server.
+        # Frames of their own alphas need no transform matrix.
+        if np.ndim(alpha) == 0:
+            _freqt_matrix(n_fft // 2, M, alpha, dtype)
+            _freqt_matrix(2 * M, n_fft // 2, -alpha, dtype)
+            _fused_matrix(M, n_fft, alpha, dtype)
+    if T <= B:
+        with _stage('periodogram'):
+            log_I = log_periodogram(0, T)
+        return _analyze(log_I, M, alpha, n_iter, tol, init, energy_threshold,
+                        flatness_threshold, parallel=n_jobs is None)
+
+    mc = np.empty((M + 1, T), dtype=dtype)
+    n = np.empty(T, dtype=np.int64)
+    fast = np.empty(T, dtype=bool)
+
+    def analyze(s):
+        e = min(s + B, T)
+        if isinstance(init, np.ndarray) and 1 < init.shape[1]:
+            init_b = init[:, s:e]
+        else:
+            init_b = init
+        with _stage('periodogram'):
+            log_I = log_periodogram(s, e)
+        mc[:, s:e], n[s:e], fast[s:e] = _analyze(
+            log_I, M, _take_alphas(alpha, slice(s, e)), n_iter, tol, init_b,
+            energy_threshold, flatness_threshold, parallel=n_jobs is None)
+
+    if n_jobs is None or n_jobs == 1:
+        for s in range(0, T, B):
+            analyze(s)
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            for _ in executor.map(analyze, range(0, T, B)):
+                pass
+    return mc, n, fast
+
+
+def _split_groups(groups, M, n_fft, lengths=None):
+    """Split groups of frames sharing alpha into large and small ones.
+
+    Parameters
+    ----------
+    groups : list of (float, np.ndarray)
+        Pairs of frequency warping factor and indices of frames.
+
+    M : int >= 0 [scalar]
+        Order of mel-cepstral coefficients.
+
+    n_fft : int > 1 [scalar]
+        Number of FFT bins.
+
+    lengths : np.ndarray [shape=(U,)] or None
+        Number of frames of each index if the indices are of utterances.
+
+    Returns
+    -------
+    large : list of (float, np.ndarray)
+        Groups worth building transform matrices.
+
+    small : np.ndarray [shape=(K,)]
+        Sorted indices in the other groups.
+
+    """
+
+    # The transforms of a group are reused in every iteration of
+    # Newton-Raphson method, so they pay off for about as many frames as the
+    # fused matrix alone does in conversion to spectrum.
+    def is_large(idx):
+        T = len(idx) if lengths is None else np.sum(lengths[idx])
+        return _use_fused(M, n_fft, T)
+
+    large = [(a, idx) for a, idx in groups if is_large(idx)]
+    small = [idx for a, idx in groups if not is_large(idx)]
+    if small:
+        small = np.sort(np.concatenate(small))
+    else:
+        small = np.empty(0, dtype=np.int64)
+    return large, small
+
+
+def _analyze_alphas(log_periodogram, T, n_fft, M, alpha, n_iter, tol, init,
+                    energy_threshold, flatness_threshold, max_frames,
+                    memory_limit, n_jobs, dtype=np.float64):
+    """Calculate mel-cepstral coefficients of frames grouped by alpha.
+
+    Parameters
+    ----------
+    log_periodogram : callable
+        Function that takes frame indices, a slice or an integer array, and
+        returns the log periodogram of the frames.
+
+    alpha : float in (-1, 1) [scalar] or np.ndarray [shape=(T,)]
+        Frequency warping factor, or that of each frame.
+
+    Returns
+    -------
+    mc : np.ndarray [shape=(M + 1, T)]
+        M-th order mel-cesptral coefficients.
+
+    n : np.ndarray [shape=(T,)]
+        Number of iterations performed on each frame.
+
+    fast : np.ndarray [shape=(T,)]
+        True if the frame took fast path.
+
+    See also
+    --------
+    _analyze_blocks : Description of the other parameters.
+
+    """
+
+    groups = _group_by_alpha(alpha)
+    if len(groups) == 1:
+        return _analyze_blocks(
+            lambda s, e: log_periodogram(slice(s, e)), T, n_fft, M,
+            groups[0][0], n_iter, tol, init, energy_threshold,
+            flatness_threshold, max_frames, memory_limit, n_jobs, dtype)
+
+    # Each large group of frames sharing alpha is analyzed with its own
+    # cached transforms. Building the transforms for a few frames costs more
+    # than the recursions, so the other frames are analyzed together frame
+    # by frame with their own alphas.
+    groups, small = _split_groups(groups, M, n_fft)
+    if 0 < len(small):
+        groups.append((alpha[small], small))
+
+    mc = np.empty((M + 1, T), dtype=dtype)
+    n = np.empty(T, dtype=np.int64)
+    fast = np.empty(T, dtype=bool)
+    for a, idx in groups:
+        if isinstance(init, np.ndarray) and 1 < init.shape[1]:
+            init_a = init[:, idx]
+        else:
+            init_a = init
+        mc[:, idx], n[idx], fast[idx] = _analyze_blocks(
+            lambda s, e, idx=idx: log_periodogram(idx[s:e]), len(idx), n_fft,
+            M, a, n_iter, tol, init_a, energy_threshold, flatness_threshold,
+            max_frames, memory_limit, n_jobs, dtype)
+    return mc, n, fast
+
+
+def stft_to_mcep(S, M=24, alpha=0.42, n_iter=10, tol=1e-4, eps=0, sr=None,
+                 init=None, energy_threshold=None, flatness_threshold=None,
+                 max_frames=None, memory_limit=None, n_jobs=None,
+                 dtype=np.float64, cache=None, return_n_iter=False,
+                 return_mask=False):
     """Calculate mel-cepstral coefficients from a magnitude spectrogram.
 
     Parameters
@@ -25,27 +824,93 @@ def stft_to_mcep(S, M=24, alpha=0.42, n_iter=10, tol=1e-4, eps=0, sr=None):
     M : int >= 0 [scalar]
         Order of mel-cepstral coefficients.
 
-    alpha : float in (-1, 1) [scalar]
-        Frequency warping factor.
+    alpha : float in (-1, 1) [scalar] or array-like [shape=(T,)]
+        Frequency warping factor, or that of each frame. Frames sharing a
+        factor with many others are analyzed with the transform matrices of
+        the factor, and the other frames by recursions with their own
+        factors, so that distinct factors of all frames cost about as much
+        as a single factor.
 
     n_iter : int >= 0 [scalar]
         Number of iterations of Newton-Raphson method.
 
     tol : float >= 0 [scalar]:
-        Relative tolerance.
+        Relative tolerance. Convergence is checked frame by frame.
 
     eps : float >= 0 [scalar]
         A very small value added to periodogram to avoid NaN caused by log().
 
     sr : float > 0 [scalar]
         Sampling rate in Hz. If not None, given alpha is overwritten with
-        appropriate one computed by a simple algorithm.
+        appropriate one fitted to the mel scale by
+        :func:`horoscopy.utils.sr_to_alpha`.
+
+    init : None, 'previous', or array-like [shape=(M + 1,) or (M + 1, T)]
+        Initial mel-cepstral coefficients of Newton-Raphson method. If None,
+        they are computed from the cepstrum of each frame (cold start). If
+        'previous', even frames are cold-started and each odd frame is
+        seeded from the converged coefficients of the preceding frame, so
+        that the iterations stay vectorized over frames. Since only half of
+        the frames are warm-started, the saving is modest; e.g., the mean
+        number of iterations drops from 5.85 to 5.55 on speech. Warm-started
+        frames whose iterations diverge are recomputed from the cold start.
+
+    energy_threshold : float >= 0 [scalar] or None
+        Frames whose mean periodogram is below this value are regarded as
+        silent. Silent frames take fast path, i.e., the initial guess of
+        Newton-Raphson method is returned without any iteration.
+
+    flatness_threshold : float in [0, 1] [scalar] or None
+        Frames whose spectral flatness, the ratio of the geometric mean to the
+        arithmetic mean of periodogram, is above this value are regarded as
+        noise-like and take fast path as well.
+
+    max_frames : int > 0 [scalar] or None
+        Maximum number of frames processed at once. The result is the same as
+        that without the limit up to rounding errors.
+
+    memory_limit : int > 0 [scalar] or None
+        Approximate upper bound of working memory in bytes, which limits the
+        number of frames processed at once as well as `max_frames`.
+
+    n_jobs : int > 0 or -1 [scalar] or None
+        Number of threads. If -1, the number of CPUs is used. If not None,
+        frames are split into blocks of fixed size, which are analyzed by a
+        thread pool with the single-threaded solver, so the result does not
+        depend on `n_jobs`. If None, frames are analyzed in the calling
+        thread with the multi-threaded solver.
+
+    dtype : np.float32 or np.float64
+        Data type of computation and output. In single precision, the
+        transform matrices are computed in double precision and rounded.
+        The maximum absolute error of single precision against SPTK is
+        about 3e-5 on 16 kHz speech with M = 24.
+
+    cache : horoscopy.cache.DiskCache or None
+        Persistent cache of results. The key is a hash of the input and the
+        parameters changing the result, i.e., all of them except
+        `max_frames`, `memory_limit`, and `n_jobs`, which affect only
+        rounding errors, and the version of this package.
+
+    return_n_iter : bool [scalar]
+        If True, also return the number of iterations of each frame.
+
+    return_mask : bool [scalar]
+        If True, also return the mask of frames taking fast path.
 
     Returns
     -------
     mc : np.ndarray [shape=(M + 1, T)]
         M-th order mel-cesptral coefficients.
 
+    n_iter : np.ndarray [shape=(T,)]
+        Number of iterations performed on each frame until convergence.
+        Returned only if `return_n_iter` is True.
+
+    mask : np.ndarray [shape=(T,)]
+        True if the frame took fast path. Returned only if `return_mask` is
+        True.
+
     Notes
     -----
     This implementation is based on an unpublished paper.
@@ -57,24 +922,6 @@ def stft_to_mcep(S, M=24, alpha=0.42, n_iter=10, tol=1e-4, eps=0, sr=None):
 
     """
 
-    # Perform coefficients frequency transform.
-    def tilde(x, M, alpha):
-        if 'A' not in dir(tilde):
-            m = x.shape[0]
-            tilde.A = np.zeros((M, m))
-            tilde.A[0, 0] = 1
-            if 1 < M:
-                tilde.A[1:, 0] = (-alpha) ** np.arange(1, M)
-            if 1 < M and 1 < m:
-                tilde.A[1, 1:] = alpha ** np.arange(m - 1) * (1 - alpha * alpha)
-            for i in range(2, M):
-                i1 = i - 1
-                for j in range(1, m):
-                    j1 = j - 1
-                    tilde.A[i, j] = (tilde.A[i1, j1] +
-                                     alpha * (tilde.A[i, j1] - tilde.A[i1, j]))
-        return np.matmul(tilde.A, x)
-
     S = _asarray(S)
     if S.ndim == 1:
         is_vector_input = True
@@ -87,68 +934,271 @@ def stft_to_mcep(S, M=24, alpha=0.42, n_iter=10, tol=1e-4, eps=0, sr=None):
     if S.shape[0] <= 1:
         raise ValueError('S.shape[0] must be greater than 1')
 
-    if M < 0:
-        raise ValueError('Order M must be a non-negative integer')
+    init, alpha, dtype = _check_params(M, alpha, n_iter, tol, eps, sr, init,
+                                       energy_threshold, flatness_threshold,
+                                       max_frames, memory_limit, n_jobs,
+                                       dtype)
 
-    if n_iter < 0:
-        raise ValueError('Number of iterations must be a non-negative integer')
+    alpha = _check_alphas(alpha, S.shape[1])
 
-    if tol < 0:
-        raise ValueError('Relative tolerance must be a non-negative number')
+    n_fft = 2 * (S.shape[0] - 1)
+    fast_path = energy_threshold is not None or flatness_threshold is not None
 
-    if eps < 0:
-        raise ValueError('Value eps must be a non-negative number')
+    def analyze():
+        return _analyze_alphas(
+            lambda key: _log_periodogram(S[:, key], eps, fast_path, dtype),
+            S.shape[1], n_fft, M, alpha, n_iter, tol, init, energy_threshold,
+            flatness_threshold, max_frames, memory_limit, n_jobs, dtype)
 
-    if sr is not None:
-        alpha = sr_to_alpha(sr)
+    if cache is None:
+        mc, n, fast = analyze()
+    else:
+        key = _digest('stft_to_mcep', __version__, S, M, alpha,
+                      n_iter, tol, eps, init, energy_threshold,
+                      flatness_threshold, dtype.str)
+        mc, n, fast = cache.get(key, analyze)
 
-    check_alpha(alpha)
+    if is_vector_input:
+        mc = np.squeeze(mc, axis=-1)
+        n = n[0]
+        fast = fast[0]
 
-    n_fft = 2 * (S.shape[0] - 1)
-    h_fft = n_fft // 2
-    L = M + 1
+    if return_n_iter and return_mask:
+        return mc, n, fast
+    elif return_n_iter:
+        return mc, n
+    elif return_mask:
+        return mc, fast
+    return mc
 
-    # Compute (-a)^0, (-a)^1, (-a)^2, ..., (-a)^M.
-    a = np.expand_dims((-alpha) ** np.arange(L), axis=-1)
 
-    # Compute log periodogram.
-    log_I = 2 * np.log(S + eps if eps > 0 else S)
+def _check_frame_params(n_fft, hop_length, win_length):
+    """Check parameters of framing.
 
-    # Make initial guess.
-    c = irfft(log_I, axis=0)[:h_fft + 1]
-    c[(0, -1), :] *= 0.5
-    mc = freqt(c, M=M, alpha=alpha, recursive=False)
+    Returns
+    -------
+    hop_length : int > 0 [scalar]
+        Number of samples between adjacent frames.
 
-    # Perform Newton-Raphson method.
-    prev_epsilon = sys.float_info.max
-    for n in range(n_iter):
-        log_D = mcep_to_stft(mc, n_fft=n_fft, alpha=alpha, log=True)
+    win_length : int in [1, n_fft] [scalar]
+        Window length.
 
-        r = irfft(np.exp(log_I - 2 * log_D), axis=0)[:h_fft + 1]
-        r_t = tilde(r, 2 * L - 1, alpha)
-        r_a = r_t[:L] - a
+    See also
+    --------
+    wave_to_mcep : Description of the parameters.
 
-        # Update mel-cepstral coefficients.
-        t = (r_t[:L], r_t[:L])
-        h = (r_t[M:], r_t[:L])
-        b = r_a
-        grad = solve_toeplitz_plus_hankel(t, h, b)
-        mc += grad
-
-        # Check convergence.
-        epsilon = np.max(r_t[0])
-        relative_change = (prev_epsilon - epsilon) / epsilon
-        if relative_change < tol:
-            break
-        prev_epsilon = epsilon
+    """
 
-    if is_vector_input:
-        mc = np.squeeze(mc, axis=-1)
+    if hop_length is None:
+        hop_length = n_fft // 4
+
+    if win_length is None:
+        win_length = n_fft
+
+    if n_fft <= 1 or n_fft % 2 != 0:
+        raise ValueError('FFT size must be a positive even integer')
+
+    if hop_length <= 0:
+        raise ValueError('Hop length must be a positive integer')
+
+    if not 0 < win_length <= n_fft:
+        raise ValueError('Window length must be in [1, n_fft]')
+
+    return hop_length, win_length
+
+
+def _frame_wave(y, n_fft, hop_length, win_length, center):
+    """Slice a waveform into frames as librosa.stft.
+
+    Returns
+    -------
+    frames : np.ndarray [shape=(T, win_length)]
+        Read-only view of the support of the window of each frame.
+
+    See also
+    --------
+    wave_to_mcep : Description of the parameters.
+
+    """
+
+    y = _asarray(y)
+    if y.ndim != 1:
+        raise ValueError('Input y must be 1-D vector')
+
+    # Only the support of the window is framed since the window is centered
+    # in the FFT buffer.
+    pad = (n_fft - win_length) // 2
+    if center:
+        T = 1 + len(y) // hop_length
+        offset = n_fft // 2 - pad
+        right = (T - 1) * hop_length + win_length - offset - len(y)
+        y = np.concatenate(
+            [np.zeros(offset), y, np.zeros(max(0, right))])
+    else:
+        if len(y) < n_fft:
+            raise ValueError('Length of y must not be less than n_fft')
+        T = 1 + (len(y) - n_fft) // hop_length
+        y = y[pad:]
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    return _frame(y, win_length, hop_length)[:T]
+
+
+def wave_to_mcep(y, M=24, alpha=0.42, n_fft=512, hop_length=None,
+                 win_length=None, window='blackman', center=True, n_iter=10,
+                 tol=1e-4, eps=0, sr=None, init=None, energy_threshold=None,
+                 flatness_threshold=None, max_frames=None, memory_limit=None,
+                 n_jobs=None, dtype=np.float64, return_n_iter=False,
+                 return_mask=False):
+    """Calculate mel-cepstral coefficients from a waveform.
+
+    Parameters
+    ----------
+    y : array-like [shape=(N,)]
+        Input waveform.
+
+    M : int >= 0 [scalar]
+        Order of mel-cepstral coefficients.
+
+    alpha : float in (-1, 1) [scalar] or array-like [shape=(T,)]
+        Frequency warping factor, or that of each frame.
+
+    n_fft : int > 1 [scalar]
+        Number of FFT bins.
+
+    hop_length : int > 0 [scalar] or None
+        Number of samples between adjacent frames. If None, n_fft / 4.
+
+    win_length : int in [1, n_fft] [scalar] or None
+        Window length. If None, n_fft.
+
+    window : string, float, or tuple
+        Type of window passed to :func:`horoscopy.window.get_sptk_window`.
+
+    center : bool [scalar]
+        If True, the t-th frame is centered at ``y[t * hop_length]`` and the
+        waveform is padded with zeros.
+
+    Returns
+    -------
+    mc : np.ndarray [shape=(M + 1, T)]
+        M-th order mel-cesptral coefficients.
+
+    n_iter : np.ndarray [shape=(T,)]
+        Number of iterations performed on each frame until convergence.
+        Returned only if `return_n_iter` is True.
+
+    mask : np.ndarray [shape=(T,)]
+        True if the frame took fast path. Returned only if `return_mask` is
+        True.
+
+    Notes
+    -----
+    The frames are the same as those of :func:`librosa.stft` with
+    ``pad_mode='constant'``, but the periodogram is computed directly from
+    zero-copy views of the frames block by block without the whole complex
+    spectrogram.
 
+    See also
+    --------
+    stft_to_mcep : Description of the other parameters.
+
+    """
+
+    hop_length, win_length = _check_frame_params(n_fft, hop_length,
+                                                 win_length)
+    init, alpha, dtype = _check_params(M, alpha, n_iter, tol, eps, sr, init,
+                                       energy_threshold, flatness_threshold,
+                                       max_frames, memory_limit, n_jobs,
+                                       dtype)
+
+    frames = _frame_wave(y, n_fft, hop_length, win_length, center)
+    T = len(frames)
+    alpha = _check_alphas(alpha, T)
+    w = _get_cached_window(window, win_length)
+
+    fast_path = energy_threshold is not None or flatness_threshold is not None
+    mc, n, fast = _analyze_alphas(
+        lambda key: _frames_to_log_periodogram(frames[key], w, n_fft, eps,
+                                               fast_path, dtype),
+        T, n_fft, M, alpha, n_iter, tol, init, energy_threshold,
+        flatness_threshold, max_frames, memory_limit, n_jobs, dtype)
+
+    if return_n_iter and return_mask:
+        return mc, n, fast
+    elif return_n_iter:
+        return mc, n
+    elif return_mask:
+        return mc, fast
     return mc
 
 
-def mcep_to_stft(C, n_fft=512, alpha=0.42, log=False):
+def _fused_key(M, n_fft, alpha, dtype=np.float64):
+    """Make a key of fused mel-cepstrum to spectrum matrix in plan cache.
+    """
+    return ('mcep_to_stft', M, n_fft, float(alpha), np.dtype(dtype).str)
+
+
+def _fused_matrix(M, n_fft, alpha, dtype=np.float64):
+    """Get matrix converting mel-cepstrum to log spectrum from plan cache.
+
+    Parameters
+    ----------
+    M : int >= 0 [scalar]
+        Order of mel-cepstral coefficients.
+
+    n_fft : int > 0 [scalar]
+        Number of FFT bins.
+
+    alpha : float in (-1, 1) [scalar]
+        Frequency warping factor.
+
+    dtype : np.dtype
+        Data type of the matrix.
+
+    Returns
+    -------
+    F : np.ndarray [shape=(1 + n_fft / 2, M + 1)]
+        Read-only matrix fusing frequency transform and real part of FFT.
+
+    """
+
+    def build():
+        c = _freqt_recursive_serial(np.eye(M + 1), n_fft // 2,
+                                    np.array([-alpha]))
+        F = rfft(c, n=n_fft, axis=0).real
+        return np.ascontiguousarray(F, dtype=dtype)
+
+    return plan_cache.get(_fused_key(M, n_fft, alpha, dtype), build)
+
+
+def _use_fused(M, n_fft, T):
+    """Decide whether the fused matrix is faster than frequency transform.
+
+    Parameters
+    ----------
+    M : int >= 0 [scalar]
+        Order of mel-cepstral coefficients.
+
+    n_fft : int > 0 [scalar]
+        Number of FFT bins.
+
+    T : int >= 1 [scalar]
+        Number of frames.
+
+    Returns
+    -------
+    fused : bool [scalar]
+        True if the fused matrix is expected to be faster.
+
+    """
+
+    # Once built, the fused matrix saves FFT and is never slower than
+    # frequency transform followed by FFT. Building the matrix costs about
+    # as much as converting M + 1 frames along the latter route.
+    return M + 1 <= T
+
+
+def mcep_to_stft(C, n_fft=512, alpha=0.42, log=False, dtype=np.float64):
     """Calculate magnitude spectrogram from mel-cepstral coefficients.
 
     Parameters
@@ -159,12 +1209,16 @@ def mcep_to_stft(C, n_fft=512, alpha=0.42, log=False):
     n_fft : int > 0 [scalar]
         Number of FFT bins.
 
-    alpha : float in (-1, 1) [scalar]
-        Frequency warping factor of the input mel-cepstral coefficients.
+    alpha : float in (-1, 1) [scalar] or array-like [shape=(T,)]
+        Frequency warping factor of the input mel-cepstral coefficients, or
+        that of each frame.
 
     log : bool [scalar]
         If True, return log-magnitude spectrogram.
 
+    dtype : np.float32 or np.float64
+        Data type of computation and output.
+
     Returns
     -------
     S : np.ndarray [shape=(1 + n_fft / 2,) or (1 + n_fft / 2, T)]
@@ -188,13 +1242,158 @@ def mcep_to_stft(C, n_fft=512, alpha=0.42, log=False):
     if n_fft <= 0:
         raise ValueError('FFT size must be a positive integer')
 
-    check_alpha(alpha)
+    M, T = C.shape[0] - 1, C.shape[1]
+    alpha = _check_alphas(alpha, T)
+
+    dtype = _check_dtype(dtype)
+
+    # Frames sharing a frequency warping factor share a fused matrix.
+    groups = _group_by_alpha(alpha)
+    if len(groups) == 1:
+        alpha = groups[0][0]
 
-    c = freqt(C, M=n_fft // 2, alpha=-alpha, recursive=False)
-    S = rfft(c, n=n_fft, axis=0).real
+    C = C.astype(dtype, copy=False)
+    if all(_fused_key(M, n_fft, a, dtype) in plan_cache for a, _ in groups) \
+       or _use_fused(M, n_fft, T // len(groups)):
+        if len(groups) == 1:
+            S = np.matmul(_fused_matrix(M, n_fft, alpha, dtype), C)
+        else:
+            S = np.empty((n_fft // 2 + 1, T), dtype=dtype)
+            for a, idx in groups:
+                S[:, idx] = np.matmul(_fused_matrix(M, n_fft, a, dtype),
+                                      C[:, idx])
+    else:
+        c = freqt(C, M=n_fft // 2, alpha=-alpha, dtype=dtype)
+        S = rfft(c, n=n_fft, axis=0).real
     if not log:
-        S = np.exp(S)
+        S = np.exp(S, out=S)
     if is_vector_input:
         S = np.squeeze(S, axis=-1)
 
     return S
+
+
+def _warped_basis(M, freqs, alpha, dtype=np.float64):
+    """Get cosine basis of warped frequencies from plan cache.
+
+    Parameters
+    ----------
+    M : int >= 0 [scalar]
+        Order of mel-cepstral coefficients.
+
+    freqs : np.ndarray [shape=(F,)]
+        Normalized angular frequencies.
+
+    alpha : float in (-1, 1) [scalar]
+        Frequency warping factor.
+
+    dtype : np.dtype
+        Data type of the matrix.
+
+    Returns
+    -------
+    B : np.ndarray [shape=(F, M + 1)]
+        Read-only matrix converting mel-cepstrum to log spectrum at `freqs`.
+
+    """
+
+    def build():
+        # Phase characteristic of the 1st order all-pass filter.
+        warped_freqs = freqs + 2 * np.arctan(
+            alpha * np.sin(freqs) / (1 - alpha * np.cos(freqs)))
+        B = np.cos(np.outer(warped_freqs, np.arange(M + 1)))
+        return B.astype(dtype, copy=False)
+
+    key = ('envelope', M, float(alpha), freqs.tobytes(), np.dtype(dtype).str)
+    return plan_cache.get(key, build)
+
+
+def mcep_to_envelope(C, freqs=None, alpha=0.42, sr=None, fmin=0, fmax=None,
+                     n_freqs=128, log=False):
+    """Calculate spectral envelope at given frequencies from mel-cepstrum.
+
+    Parameters
+    ----------
+    C : array-like [shape=(M + 1,) or (M + 1, T)]
+        Input mel-cepstral coefficients.
+
+    freqs : array-like [shape=(F,)] or None
+        Frequencies at which the envelope is evaluated. They are given in Hz
+        if `sr` is not None, otherwise in radians in [0, pi]. If None,
+        `n_freqs` frequencies evenly spaced in [`fmin`, `fmax`] are used.
+
+    alpha : float in (-1, 1) [scalar]
+        Frequency warping factor of the input mel-cepstral coefficients.
+
+    sr : float > 0 [scalar] or None
+        Sampling rate in Hz.
+
+    fmin : float >= 0 [scalar]
+        Lowest frequency used if `freqs` is None.
+
+    fmax : float >= fmin [scalar] or None
+        Highest frequency used if `freqs` is None. If None, Nyquist frequency
+        is used.
+
+    n_freqs : int > 0 [scalar]
+        Number of frequencies used if `freqs` is None.
+
+    log : bool [scalar]
+        If True, return log-magnitude envelope.
+
+    Returns
+    -------
+    H : np.ndarray [shape=(F,) or (F, T)]
+        Magnitude envelope at the frequencies.
+
+    Notes
+    -----
+    The envelope is evaluated as a cosine series of the warped frequencies
+    without the truncation of cepstrum, so the cost is proportional to the
+    number of frequencies instead of FFT size.
+
+    See also
+    --------
+    mcep_to_stft : Convert mel-cepstral coefficients to spectrum.
+
+    """
+
+    C = _asarray(C)
+    if C.ndim == 1:
+        is_vector_input = True
+        C = np.expand_dims(C, axis=-1)
+    elif C.ndim == 2:
+        is_vector_input = False
+    else:
+        raise ValueError('Input C must be 2-D matrix or 1-D vector')
+
+    if sr is not None and sr <= 0:
+        raise ValueError('Sample rate must be a positive number')
+
+    nyquist = np.pi if sr is None else 0.5 * sr
+    if freqs is None:
+        if n_freqs <= 0:
+            raise ValueError('Number of frequencies must be positive')
+        if fmax is None:
+            fmax = nyquist
+        if not 0 <= fmin <= fmax <= nyquist:
+            raise ValueError('Frequency range must be in [0, Nyquist]')
+        freqs = np.linspace(fmin, fmax, n_freqs)
+    else:
+        freqs = _asarray(freqs).astype(np.float64).ravel()
+        if np.any(freqs < 0) or np.any(nyquist < freqs):
+            raise ValueError('Frequencies must be in [0, Nyquist]')
+
+    check_alpha(alpha)
+
+    if sr is not None:
+        freqs = freqs * (np.pi / nyquist)
+
+    B = _warped_basis(C.shape[0] - 1, freqs, alpha)
+    H = np.matmul(B, C)
+    if not log:
+        H = np.exp(H, out=H)
+    if is_vector_input:
+        H = np.squeeze(H, axis=-1)
+
+    return H
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+import json
+import os
+
+import numpy as np
+
+from .cache import _digest
+from .mcep import _analyze_alphas, _check_params, _log_periodogram
+from .utils import _check_alphas
+from .version import __version__
+
+
+def _progress_key(shape, M, alpha, n_iter, tol, eps, init, energy_threshold,
+                  flatness_threshold, block_frames, max_frames, memory_limit,
+                  n_jobs, dtype):
+    """Make a hash of everything affecting the output of a run.
+    """
+
+    return _digest('stft_to_mcep_memmap', __version__, list(shape), M, alpha,
+                   n_iter, tol, eps, init, energy_threshold,
+                   flatness_threshold, block_frames, max_frames, memory_limit,
+                   n_jobs is None, dtype.str)
+
+
+def _load_progress(path, key):
+    """Load the number of frames already written by a run with the same key.
+    """
+
+    try:
+        with open(path) as f:
+            progress = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    if progress.get('key') != key:
+        return 0
+    return progress.get('frames', 0)
+
+
+def _save_progress(path, key, frames):
+    """Save the number of frames written atomically.
+    """
+
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'key': key, 'frames': int(frames)}, f)
+    os.replace(tmp, path)
+
+
+def stft_to_mcep_memmap(S, filename, M=24, alpha=0.42, n_iter=10, tol=1e-4,
+                        eps=0, sr=None, init=None, energy_threshold=None,
+                        flatness_threshold=None, block_frames=65536,
+                        max_frames=None, memory_limit=None, n_jobs=None,
+                        dtype=np.float64, resume=True):
+    """Calculate mel-cepstral coefficients of a large spectrogram into a file.
+
+    Parameters
+    ----------
+    S : array-like [shape=(1 + n_fft / 2, T), non-negative]
+        Input linear magnitude spectrogram supporting ``S.shape`` and lazy
+        slicing ``S[:, s:e]``, e.g., the transpose of a memory-mapped file
+        of frames given by :func:`horoscopy.utils.read_binary`.
+
+    filename : str
+        Output file of mel-cepstral coefficients in frame-major order as
+        SPTK.
+
+    init : None, 'previous', or array-like [shape=(M + 1,) or (M + 1, T)]
+        Initial mel-cepstral coefficients of Newton-Raphson method.
+
+    block_frames : int > 0 [scalar]
+        Number of frames read from `S` and written to the output at once.
+        Progress is saved after each block.
+
+    resume : bool [scalar]
+        If True and a previous run with the same input shape and parameters
+        was interrupted, it is continued from the last saved block.
+        Otherwise, the output file is overwritten.
+
+    Returns
+    -------
+    mc : np.memmap [shape=(M + 1, T)]
+        Read-only view of the output file.
+
+    Notes
+    -----
+    Peak memory is bounded by a block of `S` and the working memory of
+    :func:`horoscopy.stft_to_mcep` on it, independently of T. The progress
+    is recorded in ``filename + '.progress'``, which is removed when the
+    run is finished. Blocks are analyzed independently, so a resumed run
+    gives the same output as an uninterrupted one.
+
+    See also
+    --------
+    horoscopy.stft_to_mcep : Description of the other parameters.
+
+    """
+
+    if not hasattr(S, 'shape') or len(S.shape) != 2:
+        raise ValueError('Input S must be 2-D matrix')
+
+    D, T = S.shape
+    if D <= 1:
+        raise ValueError('S.shape[0] must be greater than 1')
+
+    if block_frames <= 0:
+        raise ValueError('Block size must be a positive integer')
+
+    init, alpha, dtype = _check_params(M, alpha, n_iter, tol, eps, sr, init,
+                                       energy_threshold, flatness_threshold,
+                                       max_frames, memory_limit, n_jobs,
+                                       dtype)
+    if isinstance(init, np.ndarray) and 1 < init.shape[1] != T:
+        raise ValueError('init.shape[1] must be equal to 1 or T')
+    alpha = _check_alphas(alpha, T)
+
+    progress_path = filename + '.progress'
+    key = _progress_key(S.shape, M, alpha, n_iter, tol, eps, init,
+                        energy_threshold, flatness_threshold, block_frames,
+                        max_frames, memory_limit, n_jobs, dtype)
+    nbytes = T * (M + 1) * dtype.itemsize
+    start = 0
+    if resume and os.path.exists(filename) and \
+       os.path.getsize(filename) == nbytes:
+        start = _load_progress(progress_path, key)
+
+    if T == 0:
+        open(filename, 'wb').close()
+        out = np.empty((0, M + 1), dtype=dtype)
+    else:
+        if start == 0:
+            # Record the key before any output is written.
+            _save_progress(progress_path, key, 0)
+        out = np.memmap(filename, dtype=dtype, mode='r+' if start else 'w+',
+                        shape=(T, M + 1))
+
+    n_fft = 2 * (D - 1)
+    fast_path = energy_threshold is not None or flatness_threshold is not None
+    for s in range(start, T, block_frames):
+        e = min(s + block_frames, T)
+        S_b = np.asarray(S[:, s:e])
+        if isinstance(init, np.ndarray) and 1 < init.shape[1]:
+            init_b = init[:, s:e]
+        else:
+            init_b = init
+        alpha_b = alpha[s:e] if isinstance(alpha, np.ndarray) else alpha
+        mc, _, _ = _analyze_alphas(
+            lambda key: _log_periodogram(S_b[:, key], eps, fast_path, dtype),
+            e - s, n_fft, M, alpha_b, n_iter, tol, init_b, energy_threshold,
+            flatness_threshold, max_frames, memory_limit, n_jobs, dtype)
+        out[s:e] = mc.T
+        # The data must reach the file before the progress claims it.
+        out.flush()
+        _save_progress(progress_path, key, e)
+
+    del out
+    if os.path.exists(progress_path):
+        os.remove(progress_path)
+
+    if T == 0:
+        return np.empty((M + 1, 0), dtype=dtype)
+    return np.memmap(filename, dtype=dtype, mode='r', shape=(T, M + 1)).T
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+from collections import defaultdict
+from contextlib import nullcontext
+import json
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+
+# Profiler collecting records, or None. Instrumented code checks this first
+# so that the overhead is a global lookup when profiling is disabled.
+_active = None
+
+_NULL_CONTEXT = nullcontext()
+
+
+class _Timer(object):
+    """Context manager adding its wall time to a stage of a profiler.
+    """
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args):
+        self.profiler._add_time(self.name, time.perf_counter() - self.start)
+
+
+def _stage(name):
+    """Time a stage if profiling is enabled.
+
+    Parameters
+    ----------
+    name : str
+        Name of the stage.
+
+    Returns
+    -------
+    context : context manager
+        Timer of the stage, or a context doing nothing.
+
+    """
+
+    if _active is None:
+        return _NULL_CONTEXT
+    return _Timer(_active, name)
+
+
+def _count(name, k=1):
+    """Increment a counter if profiling is enabled.
+    """
+
+    if _active is not None:
+        _active._add_count(name, k)
+
+
+def _record_iteration(i, epsilon, n_converged):
+    """Record residuals of an iteration of Newton-Raphson method.
+
+    Parameters
+    ----------
+    i : int >= 0 [scalar]
+        Index of the iteration.
+
+    epsilon : np.ndarray [shape=(T,)]
+        Residuals of the frames active in the iteration.
+
+    n_converged : int >= 0 [scalar]
+        Number of frames converged in the iteration.
+
+    """
+
+    if _active is not None:
+        _active._add_iteration(i, epsilon, n_converged)
+
+
+def _record_frames(n, fast):
+    """Record iteration counts of analyzed frames.
+
+    Parameters
+    ----------
+    n : np.ndarray [shape=(T,)]
+        Number of iterations performed on each frame.
+
+    fast : np.ndarray [shape=(T,)]
+        True if the frame took fast path.
+
+    """
+
+    if _active is not None:
+        _active._add_frames(n, fast)
+
+
+class Profiler(object):
+    """Context manager recording telemetry of mel-cepstral analysis.
+
+    Parameters
+    ----------
+    trace_memory : bool [scalar]
+        If True, the peak of memory allocated while profiling is traced by
+        tracemalloc, which slows down the analysis.
+
+    Notes
+    -----
+    Records are collected from all threads of the process while the context
+    is active, including the workers of `n_jobs`, so the time of a stage is
+    the sum over threads and may exceed the wall time. Stages are nested;
+    e.g., 'newton' includes 'mcep_to_stft', 'irfft', 'freqt', and 'solve'.
+    If profilers are nested, records are collected by the innermost one.
+
+    Examples
+    --------
+    >>> with horoscopy.Profiler() as prof:
+    ...     mc = horoscopy.stft_to_mcep(S)
+    >>> prof.to_dict()['stages']['solve']['time']
+
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+        self._previous = None
+        self.reset()
+
+    def reset(self):
+        """Discard all records.
+        """
+
+        with self._lock:
+            self._wall_time = 0.0
+            self._times = defaultdict(float)
+            self._calls = defaultdict(int)
+            self._counts = defaultdict(int)
+            self._iterations = []
+            self._histogram = np.zeros(0, dtype=np.int64)
+            self._n_frames = 0
+            self._n_fast = 0
+            self._peak_bytes = None
+
+    def __enter__(self):
+        global _active
+        self._previous = _active
+        if self.trace_memory:
+            self._was_tracing = tracemalloc.is_tracing()
+            if self._was_tracing:
+                # The peak cannot be reset before Python 3.9.
+                if hasattr(tracemalloc, 'reset_peak'):
+                    tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+        self._start = time.perf_counter()
+        _active = self
+        return self
+
+    def __exit__(self, *args):
+        global _active
+        _active = self._previous
+        with self._lock:
+            self._wall_time += time.perf_counter() - self._start
+        if self.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            if not self._was_tracing:
+                tracemalloc.stop()
+            with self._lock:
+                self._peak_bytes = max(peak, self._peak_bytes or 0)
+
+    def _add_time(self, name, t):
+        with self._lock:
+            self._times[name] += t
+            self._calls[name] += 1
+
+    def _add_count(self, name, k):
+        with self._lock:
+            self._counts[name] += k
+
+    def _add_iteration(self, i, epsilon, n_converged):
+        with self._lock:
+            while len(self._iterations) <= i:
+                self._iterations.append(
+                    {'frames': 0, 'converged': 0, 'epsilon_sum': 0.0,
+                     'epsilon_max': -np.inf})
+            it = self._iterations[i]
+            it['frames'] += len(epsilon)
+            it['converged'] += int(n_converged)
+            with np.errstate(invalid='ignore'):
+                it['epsilon_sum'] += float(np.sum(epsilon))
+                it['epsilon_max'] = max(it['epsilon_max'],
+                                        float(np.max(epsilon)))
+
+    def _add_frames(self, n, fast):
+        h = np.bincount(n)
+        with self._lock:
+            if len(self._histogram) < len(h):
+                self._histogram = np.pad(
+                    self._histogram, (0, len(h) - len(self._histogram)))
+            self._histogram[:len(h)] += h
+            self._n_frames += len(n)
+            self._n_fast += int(np.count_nonzero(fast))
+
+    def to_dict(self):
+        """Export records.
+
+        Returns
+        -------
+        records : dict
+            JSON-serializable records with the following keys.
+
+            - 'wall_time': Wall time in seconds spent in the context.
+            - 'stages': Number of calls and total time in seconds of each
+              stage.
+            - 'iterations': Number of active and converged frames, and the
+              mean and maximum residual epsilon in each iteration.
+            - 'frames': Number of analyzed frames, those taking fast path,
+              and the histogram of the number of iterations per frame.
+            - 'counters': Hits and misses of caches.
+            - 'peak_bytes': Peak of traced memory, or None.
+
+        """
+
+        with self._lock:
+            iterations = []
+            for it in self._iterations:
+                frames = it['frames']
+                iterations.append({
+                    'frames': frames,
+                    'converged': it['converged'],
+                    'epsilon_mean': it['epsilon_sum'] / frames,
+                    'epsilon_max': it['epsilon_max'],
+                })
+            return {
+                'wall_time': self._wall_time,
+                'stages': {name: {'calls': self._calls[name],
+                                  'time': self._times[name]}
+                           for name in sorted(self._times)},
+                'iterations': iterations,
+                'frames': {
+                    'total': self._n_frames,
+                    'fast': self._n_fast,
+                    'n_iter_histogram': self._histogram.tolist(),
+                },
+                'counters': dict(sorted(self._counts.items())),
+                'peak_bytes': self._peak_bytes,
+            }
+
+    def to_json(self, path=None, **kwargs):
+        """Export records as JSON.
+
+        Parameters
+        ----------
+        path : str or None
+            If not None, the records are written to this file.
+
+        kwargs : dict
+            Keyword arguments of :func:`json.dumps`.
+
+        Returns
+        -------
+        s : str
+            Records in JSON.
+
+        See also
+        --------
+        to_dict : Description of the records.
+
+        """
+
+        s = json.dumps(self.to_dict(), **kwargs)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(s)
+        return s
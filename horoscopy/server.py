@@ -0,0 +1,464 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import inspect
+import json
+import socket
+import struct
+
+import numpy as np
+
+from .batch import stft_to_mcep_batch
+from .mcep import _fused_matrix, mcep_to_stft
+from .utils import check_alpha
+
+
+# Parameters accepted by each operation. Other parameters, e.g., those
+# changing the type of returned values, are rejected.
+_PARAMS = {
+    'stft_to_mcep': ('M', 'alpha', 'n_iter', 'tol', 'eps', 'sr', 'init',
+                     'energy_threshold', 'flatness_threshold'),
+    'mcep_to_stft': ('n_fft', 'alpha', 'log'),
+}
+
+# Signature filling in default parameters of mcep_to_stft.
+_MCEP_TO_STFT = inspect.signature(mcep_to_stft)
+
+
+def _encode(header, x=None):
+    """Encode a message.
+
+    Parameters
+    ----------
+    header : dict
+        JSON-serializable header.
+
+    x : np.ndarray or None
+        Array following the header.
+
+    Returns
+    -------
+    message : bytes
+        Length of the header in 4 bytes, the header, and the array.
+
+    """
+
+    header = dict(header)
+    if x is not None:
+        x = np.ascontiguousarray(x)
+        header.update(dtype=x.dtype.str, shape=x.shape, nbytes=x.nbytes)
+    b = json.dumps(header).encode()
+    payload = x.tobytes() if x is not None else b''
+    return struct.pack('>I', len(b)) + b + payload
+
+
+def _decode_array(header, data):
+    """Decode the array of a message.
+    """
+
+    dtype = np.dtype(header['dtype'])
+    if dtype.kind != 'f':
+        raise ValueError('Array must be of floating type')
+    return np.frombuffer(data, dtype=dtype).reshape(header['shape'])
+
+
+async def _read_message(reader):
+    """Read a message from a stream.
+    """
+
+    n, = struct.unpack('>I', await reader.readexactly(4))
+    header = json.loads((await reader.readexactly(n)).decode())
+    data = await reader.readexactly(header.get('nbytes', 0))
+    return header, data
+
+
+def _compute(op, params, xs, n_jobs):
+    """Perform an operation on a batch of matrices.
+
+    Parameters
+    ----------
+    op : str
+        Name of operation.
+
+    params : dict
+        Parameters of the operation.
+
+    xs : list of np.ndarray [shape=(D, T_i)]
+        Inputs with the same number of rows.
+
+    n_jobs : int > 0 [scalar] or None
+        Number of threads passed to :func:`horoscopy.stft_to_mcep`.
+
+    Returns
+    -------
+    ys : list of np.ndarray [shape=(D', T_i)]
+        Outputs.
+
+    """
+
+    if op == 'stft_to_mcep':
+        return stft_to_mcep_batch(xs, n_jobs=n_jobs, **params)
+
+    C = np.concatenate(xs, axis=1)
+    if n_jobs is not None:
+        # Build the transform in advance so that the parallel kernel of
+        # freqt is not called from the workers for a few frames.
+        args = _MCEP_TO_STFT.bind(C, **params)
+        args.apply_defaults()
+        check_alpha(args.arguments['alpha'])
+        if 0 < args.arguments['n_fft']:
+            _fused_matrix(C.shape[0] - 1, args.arguments['n_fft'],
+                          args.arguments['alpha'])
+    y = mcep_to_stft(C, **params)
+    offsets = np.cumsum([0] + [x.shape[1] for x in xs])
+    return [y[:, s:e] for s, e in zip(offsets[:-1], offsets[1:])]
+
+
+class _Batch(object):
+    """Requests waiting to be processed together.
+    """
+
+    def __init__(self, op, params):
+        self.op = op
+        self.params = params
+        self.inputs = []
+        self.futures = []
+        self.n_frames = 0
+        self.closed = False
+
+
+class AnalysisServer(object):
+    """Analysis server gathering concurrent requests into micro-batches.
+
+    Parameters
+    ----------
+    max_batch_frames : int > 0 [scalar]
+        A batch is processed as soon as it has this number of frames.
+
+    max_wait : float >= 0 [scalar]
+        Maximum time in seconds for which the first request of a batch waits
+        for other requests.
+
+    n_workers : int > 0 [scalar]
+        Number of threads processing batches. If 1, a batch is analyzed by
+        the multi-threaded solver. Otherwise, each batch is analyzed by the
+        single-threaded solver and batches run in parallel.
+
+    Notes
+    -----
+    Requests of the same operation with the same parameters and the same
+    number of rows are gathered into a batch. Thus, the latency of a request
+    is bounded by `max_wait` plus the processing time of a batch of at most
+    `max_batch_frames` frames, and the transforms stay cached in the server
+    process.
+
+    See also
+    --------
+    AnalysisClient : Client of the server.
+
+    """
+
+    def __init__(self, max_batch_frames=4096, max_wait=0.005, n_workers=1):
+        if max_batch_frames <= 0:
+            raise ValueError('Maximum batch size must be a positive integer')
+
+        if max_wait < 0:
+            raise ValueError('Maximum wait must be a non-negative number')
+
+        if n_workers <= 0:
+            raise ValueError('Number of workers must be a positive integer')
+
+        self.max_batch_frames = max_batch_frames
+        self.max_wait = max_wait
+        self._n_jobs = None if n_workers == 1 else 1
+        self._executor = ThreadPoolExecutor(n_workers)
+        self._batches = {}
+
+    async def start(self, path=None, host='127.0.0.1', port=0):
+        """Start serving.
+
+        Parameters
+        ----------
+        path : str or None
+            Path of Unix socket. If None, TCP is used.
+
+        host : str
+            Host name of TCP server.
+
+        port : int >= 0 [scalar]
+            Port of TCP server. If 0, a free port is chosen.
+
+        Returns
+        -------
+        server : asyncio.AbstractServer
+            Started server.
+
+        """
+
+        if path is not None:
+            return await asyncio.start_unix_server(self._handle, path=path)
+        return await asyncio.start_server(self._handle, host=host, port=port)
+
+    def close(self):
+        """Shut down the worker pool.
+        """
+
+        self._executor.shutdown(wait=True)
+
+    async def _handle(self, reader, writer):
+        """Handle requests of a connection one by one.
+        """
+
+        try:
+            while True:
+                try:
+                    header, data = await _read_message(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                try:
+                    y = await self._submit(header, data)
+                    message = _encode({}, y)
+                except Exception as e:
+                    message = _encode({'error': str(e)})
+                writer.write(message)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _submit(self, header, data):
+        """Add a request to a batch and wait for the result.
+        """
+
+        op = header.get('op')
+        if op not in _PARAMS:
+            raise ValueError('Unexpected operation: ' + str(op))
+        params = header.get('params', {})
+        for name in params:
+            if name not in _PARAMS[op]:
+                raise ValueError('Unexpected parameter: ' + name)
+        # Requests are batched by concatenating their frames, so neither a
+        # frequency warping factor per frame nor warm starts from preceding
+        # frames, which may belong to other requests, are supported.
+        if not np.isscalar(params.get('alpha', 0)):
+            raise ValueError('alpha must be a scalar')
+        if params.get('init') == 'previous':
+            raise ValueError('init must not be previous')
+
+        x = _decode_array(header, data)
+        is_vector_input = x.ndim == 1
+        if is_vector_input:
+            x = np.expand_dims(x, axis=-1)
+        elif x.ndim != 2:
+            raise ValueError('Input must be 2-D matrix or 1-D vector')
+
+        loop = asyncio.get_running_loop()
+        key = (op, json.dumps(params, sort_keys=True), x.shape[0])
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch(op, params)
+            loop.call_later(self.max_wait, self._flush, key, batch)
+        future = loop.create_future()
+        batch.inputs.append(x)
+        batch.futures.append(future)
+        batch.n_frames += x.shape[1]
+        if self.max_batch_frames <= batch.n_frames:
+            self._flush(key, batch)
+
+        y = await future
+        return np.squeeze(y, axis=-1) if is_vector_input else y
+
+    def _flush(self, key, batch):
+        """Send a batch to the worker pool.
+        """
+
+        if batch.closed:
+            return
+        batch.closed = True
+        if self._batches.get(key) is batch:
+            del self._batches[key]
+        asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        """Process a batch and set the results.
+        """
+
+        loop = asyncio.get_running_loop()
+        try:
+            ys = await loop.run_in_executor(
+                self._executor, _compute, batch.op, batch.params,
+                batch.inputs, self._n_jobs)
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, y in zip(batch.futures, ys):
+            if not future.done():
+                future.set_result(y)
+
+
+class AnalysisClient(object):
+    """Blocking client of :class:`AnalysisServer`.
+
+    Parameters
+    ----------
+    path : str or None
+        Path of Unix socket. If None, TCP is used.
+
+    host : str
+        Host name of TCP server.
+
+    port : int > 0 [scalar] or None
+        Port of TCP server.
+
+    timeout : float > 0 [scalar] or None
+        Timeout of socket operations in seconds.
+
+    Notes
+    -----
+    A client holds a connection, whose requests are processed one by one.
+    Use a client per thread to send concurrent requests.
+
+    """
+
+    def __init__(self, path=None, host='127.0.0.1', port=None, timeout=None):
+        if path is not None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(path)
+        elif port is not None:
+            self._sock = socket.create_connection((host, port), timeout)
+        else:
+            raise ValueError('Either path or port must be given')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the connection.
+        """
+
+        self._sock.close()
+
+    def _recv(self, n):
+        """Receive exactly n bytes.
+        """
+
+        buf = bytearray(n)
+        view = memoryview(buf)
+        while view:
+            k = self._sock.recv_into(view)
+            if k == 0:
+                raise ConnectionError('Connection closed by server')
+            view = view[k:]
+        return bytes(buf)
+
+    def _request(self, op, x, params):
+        """Send a request and receive the result.
+        """
+
+        x = np.asarray(x, dtype=np.float64)
+        self._sock.sendall(_encode({'op': op, 'params': params}, x))
+        n, = struct.unpack('>I', self._recv(4))
+        header = json.loads(self._recv(n).decode())
+        if 'error' in header:
+            raise ValueError(header['error'])
+        return _decode_array(header, self._recv(header['nbytes'])).copy()
+
+    def stft_to_mcep(self, S, **params):
+        """Calculate mel-cepstral coefficients on the server.
+
+        Parameters
+        ----------
+        S : array-like [shape=(1 + n_fft / 2,) or (1 + n_fft / 2, T)]
+            Input linear magnitude spectrogram.
+
+        params : dict
+            Scalar parameters of :func:`horoscopy.stft_to_mcep`. Warm starts
+            by init='previous' are not supported, since frames of other
+            requests may precede those of this request in a batch.
+
+        Returns
+        -------
+        mc : np.ndarray [shape=(M + 1,) or (M + 1, T)]
+            M-th order mel-cesptral coefficients.
+
+        """
+
+        return self._request('stft_to_mcep', S, params)
+
+    def mcep_to_stft(self, C, **params):
+        """Calculate magnitude spectrogram on the server.
+
+        Parameters
+        ----------
+        C : array-like [shape=(M + 1,) or (M + 1, T)]
+            Input mel-cepstral coefficients.
+
+        params : dict
+            Parameters of :func:`horoscopy.mcep_to_stft`.
+
+        Returns
+        -------
+        S : np.ndarray [shape=(1 + n_fft / 2,) or (1 + n_fft / 2, T)]
+            Converted magnitude spectrogram.
+
+        """
+
+        return self._request('mcep_to_stft', C, params)
+
+
+def main(argv=None):
+    """Run an analysis server until interrupted.
+
+    Parameters
+    ----------
+    argv : list of str or None
+        Command line arguments. If None, sys.argv is used.
+
+    """
+
+    parser = argparse.ArgumentParser(
+        prog='horoscopy-server',
+        description='Serve mel-cepstral analysis with micro-batching.')
+    parser.add_argument('--socket', help='path of Unix socket')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='host name of TCP server')
+    parser.add_argument('--port', type=int, default=8765,
+                        help='port of TCP server')
+    parser.add_argument('--max-batch-frames', type=int, default=4096,
+                        help='maximum number of frames in a batch')
+    parser.add_argument('--max-wait', type=float, default=0.005,
+                        help='maximum wait for a batch in seconds')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of worker threads')
+    args = parser.parse_args(argv)
+
+    server = AnalysisServer(max_batch_frames=args.max_batch_frames,
+                            max_wait=args.max_wait, n_workers=args.workers)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    s = loop.run_until_complete(
+        server.start(path=args.socket, host=args.host, port=args.port))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        s.close()
+        loop.run_until_complete(s.wait_closed())
+        server.close()
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+import numpy as np
+
+from .mcep import _analyze, _frame, _frames_to_log_periodogram
+from .utils import check_alpha, sr_to_alpha
+from .window import _get_cached_window
+
+
+class StreamingAnalyzer(object):
+    """Mel-cepstral analyzer of audio streams.
+
+    Parameters
+    ----------
+    M : int >= 0 [scalar]
+        Order of mel-cepstral coefficients.
+
+    alpha : float in (-1, 1) [scalar]
+        Frequency warping factor.
+
+    n_fft : int > 1 [scalar]
+        Number of FFT bins.
+
+    hop_length : int > 0 [scalar] or None
+        Number of samples between adjacent frames. If None, n_fft / 4.
+
+    win_length : int in [1, n_fft] [scalar] or None
+        Window length. If None, n_fft.
+
+    window : string, float, or tuple
+        Type of window passed to :func:`horoscopy.window.get_sptk_window`.
+
+    n_iter : int >= 0 [scalar]
+        Number of iterations of Newton-Raphson method.
+
+    tol : float >= 0 [scalar]
+        Relative tolerance. Convergence is checked frame by frame.
+
+    eps : float >= 0 [scalar]
+        A very small value added to magnitude spectrum to avoid NaN caused
+        by log().
+
+    sr : float > 0 [scalar] or None
+        Sampling rate in Hz. If given, alpha is overwritten.
+
+    init : None or 'previous'
+        Initialization of the iterations. If 'previous', frames are warm
+        started as in :func:`horoscopy.stft_to_mcep` across chunks.
+
+    Attributes
+    ----------
+    latency : int >= 0 [scalar]
+        Number of samples following the center of a frame that have to be
+        given before the frame is emitted.
+
+    n_iter_ : np.ndarray [shape=(T,)]
+        Number of iterations performed on each frame emitted by the last
+        call.
+
+    Notes
+    -----
+    Frames are centered at multiples of `hop_length` and the signal is
+    padded with zeros as :func:`librosa.stft` with ``center=True`` and
+    ``pad_mode='constant'``. Thus the frames emitted by all calls of
+    :meth:`process` followed by :meth:`flush` are the same as those of
+    :func:`horoscopy.stft_to_mcep` applied to the magnitude of the STFT of
+    the whole signal up to rounding errors. Only the samples not yet
+    consumed and the log periodogram of the last frame are kept between
+    calls, so the cost of a call is proportional to the number of new
+    frames.
+
+    See also
+    --------
+    horoscopy.stft_to_mcep : Convert spectrum to mel-cepstral coefficients.
+
+    """
+
+    def __init__(self, M=24, alpha=0.42, n_fft=512, hop_length=None,
+                 win_length=None, window='blackman', n_iter=10, tol=1e-4,
+                 eps=0, sr=None, init='previous'):
+        if hop_length is None:
+            hop_length = n_fft // 4
+
+        if win_length is None:
+            win_length = n_fft
+
+        if M < 0:
+            raise ValueError('Order M must be a non-negative integer')
+
+        if n_fft <= 1 or n_fft % 2 != 0:
+            raise ValueError('FFT size must be a positive even integer')
+
+        if hop_length <= 0:
+            raise ValueError('Hop length must be a positive integer')
+
+        if not 0 < win_length <= n_fft:
+            raise ValueError('Window length must be in [1, n_fft]')
+
+        if n_iter < 0:
+            raise ValueError(
+                'Number of iterations must be a non-negative integer')
+
+        if tol < 0:
+            raise ValueError(
+                'Relative tolerance must be a non-negative number')
+
+        if eps < 0:
+            raise ValueError('Value eps must be a non-negative number')
+
+        if init is not None and init != 'previous':
+            raise ValueError('Unexpected initialization: ' + str(init))
+
+        if sr is not None:
+            alpha = sr_to_alpha(sr, refine=True)
+
+        check_alpha(alpha)
+
+        self.M = M
+        self.alpha = alpha
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.win_length = win_length
+        self.n_iter = n_iter
+        self.tol = tol
+        self.eps = eps
+        self.init = init
+
+        # The first sample of the window of frame t is located at
+        # t * hop_length - offset.
+        self._window = _get_cached_window(window, win_length)
+        self._offset = n_fft // 2 - (n_fft - win_length) // 2
+        self.latency = win_length - self._offset
+        self.reset()
+
+    def reset(self):
+        """Discard the state and start a new stream.
+        """
+
+        self._buffer = np.zeros(self._offset)
+        self._n_samples = 0
+        self._t = 0
+        self._last = None
+        self.n_iter_ = np.empty(0, dtype=np.int64)
+
+    def process(self, y):
+        """Analyze a chunk of audio.
+
+        Parameters
+        ----------
+        y : array-like [shape=(N,)]
+            Chunk of audio samples of arbitrary length.
+
+        Returns
+        -------
+        mc : np.ndarray [shape=(M + 1, T)]
+            Mel-cepstral coefficients of the frames completed by the chunk.
+
+        """
+
+        y = np.asarray(y, dtype=np.float64)
+        if y.ndim != 1:
+            raise ValueError('Input y must be 1-D vector')
+
+        self._n_samples += len(y)
+        buffer = np.concatenate([self._buffer, y])
+        T = len(_frame(buffer, self.win_length, self.hop_length))
+        return self._emit(buffer, T)
+
+    def flush(self):
+        """Analyze the remaining frames and reset the state.
+
+        Returns
+        -------
+        mc : np.ndarray [shape=(M + 1, T)]
+            Mel-cepstral coefficients of the remaining frames, which are
+            padded with zeros.
+
+        """
+
+        T = 1 + self._n_samples // self.hop_length - self._t
+        length = (T - 1) * self.hop_length + self.win_length
+        buffer = np.concatenate(
+            [self._buffer, np.zeros(max(0, length - len(self._buffer)))])
+        mc = self._emit(buffer, T)
+        n = self.n_iter_
+        self.reset()
+        self.n_iter_ = n
+        return mc
+
+    def _emit(self, buffer, T):
+        """Analyze the first T frames in buffer and consume them.
+        """
+
+        if T <= 0:
+            self._buffer = buffer
+            self.n_iter_ = np.empty(0, dtype=np.int64)
+            return np.empty((self.M + 1, 0))
+
+        frames = _frame(buffer, self.win_length, self.hop_length)[:T]
+        log_I = _frames_to_log_periodogram(frames, self._window, self.n_fft,
+                                           self.eps, False)
+
+        # An odd frame is warm started from the preceding even frame, so the
+        # last frame of the previous call is analyzed again if needed.
+        carry = self.init is not None and self._t % 2 == 1
+        if carry:
+            log_I = np.concatenate([self._last, log_I], axis=1)
+        self._last = log_I[:, -1:].copy()
+
+        mc, n, _ = _analyze(log_I, self.M, self.alpha, self.n_iter, self.tol,
+                            self.init, None, None)
+        if carry:
+            mc = mc[:, 1:]
+            n = n[1:]
+
+        self._buffer = buffer[T * self.hop_length:].copy()
+        self._t += T
+        self.n_iter_ = n
+        return mc
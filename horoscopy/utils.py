@@ -4,8 +4,8 @@
 # Copyright (c) 2020 Takenori Yoshimura
 # Licensed under the MIT license
 
+import functools
 import os
-import struct
 
 import numpy as np
 
@@ -38,36 +38,73 @@ def _asarray(a):
     return a
 
 
-def _dtype_to_pack_info(dtype):
-    """Get information from data type string for pack and unpack.
+def _check_dtype(dtype):
+    """Check whether given floating-point data type is supported or not.
 
     Parameters
     ----------
-    dtype : str
-        One of the following string values: 'char', 'short', 'int', 'float',
-        'double'.
+    dtype : np.dtype
+        np.float32 or np.float64.
 
     Returns
     -------
-    c : str
-        Format character.
+    dtype : np.dtype
+        Validated data type.
 
-    size : int
-        Size required by the format.
+    """
+
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError('Data type must be float32 or float64')
+    return dtype
+
+
+def _to_numpy_dtype(dtype, endian='='):
+    """Convert data type of SPTK to that of numpy.
+
+    Parameters
+    ----------
+    dtype : str or np.dtype
+        One of the following string values: 'char', 'uchar', 'short',
+        'ushort', 'int', 'uint', 'long', 'ulong', 'float', 'double', or
+        numpy data type.
+
+    endian : str
+        Byte order: '=' (native), '<' (little), or '>' (big). If '=',
+        the byte order of numpy data type is kept.
+
+    Returns
+    -------
+    dtype : np.dtype
+        Numpy data type with the given byte order.
 
     """
 
     dic = {
-        'char' : ('c', 1),
-        'short' : ('h', 2),
-        'int' : ('i', 4),
-        'float' : ('f', 4),
-        'double' : ('d', 8),
+        'char' : 'i1',
+        'uchar' : 'u1',
+        'short' : 'i2',
+        'ushort' : 'u2',
+        'int' : 'i4',
+        'uint' : 'u4',
+        'long' : 'i8',
+        'ulong' : 'u8',
+        'float' : 'f4',
+        'double' : 'f8',
     }
 
-    if dtype not in dic.keys():
-        raise NotImplementedError('Unexpected data type: ' + dtype)
-    return dic[dtype]
+    if endian not in ('=', '<', '>'):
+        raise ValueError('Unexpected byte order: ' + str(endian))
+
+    if isinstance(dtype, str) and dtype in dic:
+        dtype = dic[dtype]
+    try:
+        dtype = np.dtype(dtype)
+    except TypeError:
+        raise NotImplementedError('Unexpected data type: ' + str(dtype))
+    if dtype.kind not in 'iuf':
+        raise NotImplementedError('Unexpected data type: ' + str(dtype))
+    return dtype if endian == '=' else dtype.newbyteorder(endian)
 
 
 def check_alpha(alpha):
@@ -75,16 +112,200 @@ def check_alpha(alpha):
 
     Parameters
     ----------
+    alpha : float [scalar] or array-like
+        Frequency warping factor(s).
+
+    """
+
+    if np.any(np.abs(alpha) >= 1.0):
+        raise ValueError('|alpha| must be less than 1.0')
+
+
+def _check_alphas(alpha, T=None):
+    """Check scalar or per-frame frequency warping factors.
+
+    Parameters
+    ----------
+    alpha : float [scalar] or array-like [shape=(T,)]
+        Frequency warping factor(s).
+
+    T : int >= 0 [scalar] or None
+        Number of frames. If None, the length is not checked.
+
+    Returns
+    -------
+    alpha : float [scalar] or np.ndarray [shape=(T,)]
+        Validated frequency warping factor(s).
+
+    """
+
+    if np.ndim(alpha) == 0:
+        check_alpha(alpha)
+        return float(alpha)
+
+    alpha = _asarray(alpha).astype(np.float64)
+    if alpha.ndim != 1:
+        raise ValueError('alpha must be a scalar or 1-D vector')
+    if T is not None and len(alpha) != T:
+        raise ValueError('Length of alpha must be equal to number of frames')
+    check_alpha(alpha)
+    return alpha
+
+
+def _group_by_alpha(alpha):
+    """Group frames by frequency warping factor.
+
+    Parameters
+    ----------
+    alpha : float [scalar] or np.ndarray [shape=(T,)]
+        Frequency warping factor, or that of each frame.
+
+    Returns
+    -------
+    groups : list of (float, slice or np.ndarray)
+        Pairs of a unique frequency warping factor and the indices of frames
+        with it in ascending order. If there is only one factor, the indices
+        are ``slice(None)``.
+
+    """
+
+    if np.ndim(alpha) == 0:
+        return [(alpha, slice(None))]
+
+    alphas, inverse = np.unique(alpha, return_inverse=True)
+    if len(alphas) <= 1:
+        # All frames, if any, share a factor.
+        return [(float(alphas[0]) if len(alphas) else 0.0, slice(None))]
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.cumsum(np.bincount(inverse, minlength=len(alphas)))[:-1]
+    return list(zip(alphas.tolist(), np.split(order, bounds)))
+
+
+def _take_alphas(alpha, key):
+    """Select frequency warping factors of frames.
+
+    Parameters
+    ----------
+    alpha : float [scalar] or np.ndarray [shape=(T,)]
+        Frequency warping factor, or that of each frame.
+
+    key : slice or np.ndarray
+        Indices or mask of frames.
+
+    Returns
+    -------
+    alpha : float [scalar] or np.ndarray
+        Frequency warping factor, or those of the selected frames.
+
+    """
+
+    return alpha if np.ndim(alpha) == 0 else alpha[key]
+
+
+def _warped_freq(alpha, N):
+    """Compute phase characteristics of the 1st order all-pass filters.
+
+    Parameters
+    ----------
+    alpha : np.ndarray [shape=(K, 1)]
+        Frequency warping factors.
+
+    N : int >= 2 [scalar]
+        Number of sample points in the frequency domain.
+
+    Returns
+    -------
+    warped_omega : np.ndarray [shape=(K, N)]
+        Warped frequencies in [0, pi].
+
+    """
+
+    omega = np.arange(N) * (np.pi / (N - 1))
+    alpha2 = alpha * alpha
+    numer = (1 - alpha2) * np.sin(omega)
+    denom = (1 + alpha2) * np.cos(omega) - 2 * alpha
+    # The numerator is nonnegative, so the phase is already unwrapped.
+    return np.arctan2(numer, denom)
+
+
+def _target_freq(sr, N, scale):
+    """Compute frequencies on an auditory scale and normalize them.
+
+    Parameters
+    ----------
+    sr : float > 0 [scalar]
+        Sampling rate in Hz.
+
+    N : int >= 2 [scalar]
+        Number of sample points in the frequency domain.
+
+    scale : ['mel', 'bark', 'erb']
+        Auditory scale.
+
+    Returns
+    -------
+    target : np.ndarray [shape=(N,)]
+        Frequencies on the scale normalized to [0, pi].
+
+    """
+
+    freq = np.arange(N) * (0.5 * sr / (N - 1))
+    if scale == 'mel':
+        # G. Fant.
+        target = np.log(1 + freq / 1000)
+    elif scale == 'bark':
+        # E. Zwicker and E. Terhardt.
+        target = (13 * np.arctan(0.00076 * freq) +
+                  3.5 * np.arctan(np.square(freq / 7500)))
+    elif scale == 'erb':
+        # B. R. Glasberg and B. C. J. Moore.
+        target = 21.4 * np.log10(1 + 0.00437 * freq)
+    else:
+        raise ValueError('Unexpected scale: ' + str(scale))
+    return target * (np.pi / target[-1])
+
+
+@functools.lru_cache(maxsize=None)
+def _fit_alpha(sr, N, step, scale, refine):
+    """Fit frequency warping factor to an auditory scale.
+
+    Returns
+    -------
     alpha : float [scalar]
         Frequency warping factor.
 
+    error : float >= 0 [scalar]
+        Squared L2 distance between the warped and target frequencies.
+
     """
 
-    if np.abs(alpha) >= 1.0:
-        raise ValueError('|alpha| must be less than 1.0')
+    target = _target_freq(sr, N, scale)
+
+    def error(alpha):
+        return np.sum(np.square(target - _warped_freq(alpha, N)), axis=-1)
 
+    # Search appropriate alpha in terms of L2 distance.
+    grid_alpha = np.arange(0, 1, step)
+    dist = error(grid_alpha[:, None])
+    k = np.argmin(dist)
+    alpha, dist = grid_alpha[k], dist[k]
 
-def sr_to_alpha(sr, N=10, step=0.01):
+    if refine:
+        from scipy.optimize import minimize_scalar
+
+        # The distance is unimodal around the best point of the grid.
+        lower = max(alpha - step, 0)
+        upper = min(alpha + step, np.nextafter(1, 0))
+        res = minimize_scalar(error, bounds=(lower, upper), method='bounded',
+                              options={'xatol': 1e-10})
+        if res.fun < dist:
+            alpha, dist = res.x, res.fun
+
+    return float(alpha), float(dist)
+
+
+def sr_to_alpha(sr, N=10, step=0.01, scale='mel', refine=False,
+                return_error=False):
     """Compute frequency warping factor under given sampling rate.
 
     Parameters
@@ -98,31 +319,31 @@ def sr_to_alpha(sr, N=10, step=0.01):
     step : float > 0 [scalar]
         Step size used in grid search.
 
+    scale : ['mel', 'bark', 'erb']
+        Auditory scale approximated by the warped frequency.
+
+    refine : bool [scalar]
+        If True, the result of grid search is refined by bounded scalar
+        minimization.
+
+    return_error : bool [scalar]
+        If True, return the squared L2 distance between the warped and
+        target frequencies.
+
     Returns
     -------
-    alpha: float [scalar]
+    alpha : float [scalar]
         Frequency warping factor.
 
-    """
+    error : float >= 0 [scalar]
+        Fitting error. Returned only if `return_error` is True.
 
-    def make_warped_freq(alpha, N):
-        """Compute phase characteristic of the 1st order all-pass filter.
-        """
-        omega = np.arange(N) * (np.pi / (N - 1))
-        alpha2 = alpha * alpha
-        numer = (1 - alpha2) * np.sin(omega)
-        denom = (1 + alpha2) * np.cos(omega) - 2 * alpha
-        warped_omega = np.arctan(numer / denom)
-        warped_omega[warped_omega < 0] += np.pi  # Phase unwrapping.
-        return warped_omega
-
-    def make_mel_freq(sr, N):
-        """Compute mel-frequencies based on G. Fant and normalize them.
-        """
-        freq = np.arange(N) * (0.5 * sr / (N - 1))
-        mel_freq = np.log(1 + freq / 1000)
-        mel_freq = mel_freq * (np.pi / mel_freq[-1])
-        return mel_freq
+    Notes
+    -----
+    Results are memoized, so the search runs once for each set of
+    parameters.
+
+    """
 
     if sr <= 0:
         raise ValueError('Sample rate must be a positive number')
@@ -133,17 +354,19 @@ def sr_to_alpha(sr, N=10, step=0.01):
     if step <= 0:
         raise ValueError('Step size must be a positive number')
 
-    # Search appropriate alpha in terms of L2 distance.
-    grid_alpha = np.arange(0, 1, step)
-    target = make_mel_freq(sr, N)
-    dist = [np.sum(np.square(target - make_warped_freq(a, N)))
-            for a in grid_alpha]
-    alpha = grid_alpha[np.argmin(dist)]
+    if scale not in ('mel', 'bark', 'erb'):
+        raise ValueError('Unexpected scale: ' + str(scale))
+
+    alpha, error = _fit_alpha(float(sr), int(N), float(step), scale,
+                              bool(refine))
 
+    if return_error:
+        return alpha, error
     return alpha
 
 
-def read_binary(filename, dtype='double'):
+def read_binary(filename, dtype='double', dim=None, endian='=',
+                mmap=False):
     """Read a binary file.
 
     Parameters
@@ -151,23 +374,111 @@ def read_binary(filename, dtype='double'):
     filename : str
        Filename to read.
 
-    dtype : str
-       Input data type.
+    dtype : str or np.dtype
+       Input data type, e.g., 'float' or 'double'.
+
+    dim : int > 0 [scalar] or None
+       Dimension of a frame. If None, data is returned as a vector.
+
+    endian : str
+       Byte order of the file: '=' (native), '<' (little), or '>' (big).
+
+    mmap : bool [scalar]
+       If True, the file is memory-mapped instead of loaded.
 
     Returns
     -------
-    data : np.ndarray
-       Loaded data.
+    data : np.ndarray [shape=(N,) or (N / dim, dim)]
+       Loaded data of the input data type. If `mmap` is True, it is a
+       read-only view of the file.
 
     """
 
     if not os.path.exists(filename):
         raise OSError('No such file (%s).' % filename)
 
-    format_char, byte_size = _dtype_to_pack_info(dtype)
-    with open(filename, 'rb') as f:
-        file_size = os.path.getsize(filename)
-        data = struct.unpack(format_char * (file_size // byte_size),
-                             f.read(file_size))
+    dtype = _to_numpy_dtype(dtype, endian)
+    if dim is not None and dim <= 0:
+        raise ValueError('Dimension must be a positive integer')
+
+    file_size = os.path.getsize(filename)
+    unit = dtype.itemsize * (1 if dim is None else dim)
+    if file_size % unit != 0:
+        raise ValueError('File size (%d) is not a multiple of %d bytes' %
+                         (file_size, unit))
+
+    # np.memmap does not accept an empty file.
+    if mmap and 0 < file_size:
+        data = np.memmap(filename, dtype=dtype, mode='r')
+    else:
+        data = np.fromfile(filename, dtype=dtype)
+
+    if dim is not None:
+        data = np.reshape(data, (-1, dim))
+    return data
+
+
+def iter_binary(filename, block_size, dtype='double', dim=1, endian='='):
+    """Iterate over blocks of frames in a binary file.
+
+    Parameters
+    ----------
+    filename : str
+       Filename to read.
+
+    block_size : int > 0 [scalar]
+       Number of frames in a block. The last block may be shorter.
+
+    dtype : str or np.dtype
+       Input data type.
+
+    dim : int > 0 [scalar]
+       Dimension of a frame.
+
+    endian : str
+       Byte order of the file.
+
+    Yields
+    ------
+    block : np.ndarray [shape=(block_size, dim)]
+       Read-only view of the memory-mapped file.
+
+    Notes
+    -----
+    Only the pages touched by the caller are read from the disk, so files
+    larger than memory can be processed block by block.
+
+    """
+
+    if block_size <= 0:
+        raise ValueError('Block size must be a positive integer')
+
+    data = read_binary(filename, dtype=dtype, dim=dim, endian=endian,
+                       mmap=True)
+    for s in range(0, len(data), block_size):
+        yield data[s:s + block_size]
+
+
+def write_binary(filename, data, dtype=None, endian='='):
+    """Write a binary file.
+
+    Parameters
+    ----------
+    filename : str
+       Filename to write.
+
+    data : array-like [shape=(N,) or (T, dim)]
+       Data to be written in row-major order, i.e., frame by frame if 2-D.
+
+    dtype : str, np.dtype, or None
+       Output data type. If None, the data type of `data` is kept.
+
+    endian : str
+       Byte order of the file: '=' (native), '<' (little), or '>' (big).
+
+    """
 
-    return np.asarray(data, dtype=np.float64)
+    data = _asarray(data)
+    dtype = _to_numpy_dtype(data.dtype if dtype is None else dtype, endian)
+    # tofile writes in C order and converts nothing if types agree.
+    np.ascontiguousarray(data, dtype=dtype).tofile(filename)
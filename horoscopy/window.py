@@ -6,7 +6,7 @@
 
 import numpy as np
 
-from scipy import signal
+from .cache import plan_cache
 
 
 def get_sptk_window(window, Nx):
@@ -30,6 +30,31 @@ def get_sptk_window(window, Nx):
     if Nx <= 0:
         raise ValueError('Window length Nx must be a positive integer')
 
+    # scipy.signal takes long to import, so it is imported on first use.
+    from scipy import signal
+
     w = signal.get_window(window, Nx, fftbins=False)
     z = np.reciprocal(np.sqrt(np.dot(w, w)))
     return w * z
+
+
+def _get_cached_window(window, Nx):
+    """Return a cached read-only SPTK-like window.
+
+    Parameters
+    ----------
+    window : string, float, or tuple
+        Type of window to create.
+
+    Nx : int > 0 [scalar]
+        The number of samples in the window.
+
+    Returns
+    -------
+    w : np.ndarray [shape=(Nx,)]
+        SPTK-like window.
+
+    """
+
+    return plan_cache.get(('window', window, Nx),
+                          lambda: get_sptk_window(window, Nx))
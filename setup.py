@@ -18,26 +18,34 @@ setup(
     url='https://github.com/takenori-y/horoscopy',
     download_url='',
     packages=find_packages(exclude=('docs', 'tests')),
+    entry_points={
+        'console_scripts': [
+            'horoscopy = horoscopy.cli:main',
+            'horoscopy-server = horoscopy.server:main',
+        ],
+    },
     long_description=long_description,
     long_description_content_type='text/markdown',
     keywords='speech signal dsp',
     license='MIT',
     classifiers=[
         'License :: OSI Approved :: MIT License',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
     ],
-    python_requires='>= 3.6',
+    python_requires='>= 3.7',
     install_requires=[
-        'librosa >= 0.8.0',
         'numba >= 0.50.0',
         'numpy >= 1.15.0',
         'scipy >= 1.4.0',
     ],
     extras_require={
+        'librosa': [
+            'librosa >= 0.8.0',
+        ],
         'dev': [
             'flake8',
+            'librosa >= 0.8.0',
             'numpydoc',
             'pytest',
             'sphinx',
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+import tracemalloc
+
+import numpy as np
+
+import horoscopy
+
+
+np.random.seed(12345)
+
+
+def test_analyze(order=4, n_fft=32, T=6):
+    mc = np.cumsum(np.random.rand(order + 1, T) - 0.5, axis=1)
+    S = horoscopy.mcep_to_stft(mc, n_fft=n_fft) * np.random.rand(1, T)
+    analyzer = horoscopy.McepAnalyzer(M=order, n_fft=n_fft)
+    mc, n = horoscopy.stft_to_mcep(S, M=order, return_n_iter=True)
+    mc2 = analyzer.analyze(S)
+    np.testing.assert_array_almost_equal(mc, mc2)
+    np.testing.assert_array_equal(n, analyzer.n_iter_)
+    mc3 = analyzer.analyze(S[:, 0])
+    np.testing.assert_array_almost_equal(mc[:, 0], mc3)
+
+
+def test_synthesize(order=4, n_fft=32, T=6):
+    mc = np.random.rand(order + 1, T) - 0.5
+    analyzer = horoscopy.McepAnalyzer(M=order, n_fft=n_fft)
+    for log in (False, True):
+        S = horoscopy.mcep_to_stft(mc, n_fft=n_fft, log=log)
+        S2 = analyzer.synthesize(mc, log=log)
+        np.testing.assert_array_almost_equal(S, S2)
+
+
+def test_no_allocation(order=24, n_fft=512):
+    # Only a few small objects such as views are allocated regardless of T.
+    for T in (100, 1000):
+        S = np.random.rand(n_fft // 2 + 1, T) + 0.1
+        analyzer = horoscopy.McepAnalyzer(M=order, n_fft=n_fft)
+        mc = np.empty((order + 1, T))
+        S2 = np.empty_like(S)
+        analyzer.analyze(S, out=mc)
+        analyzer.synthesize(mc, out=S2)
+        tracemalloc.start()
+        analyzer.analyze(S, out=mc)
+        analyzer.synthesize(mc, out=S2)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert peak < 4096
+
+
+def test_empty(order=4, n_fft=32):
+    analyzer = horoscopy.McepAnalyzer(M=order, n_fft=n_fft)
+    mc = analyzer.analyze(np.empty((n_fft // 2 + 1, 0)))
+    assert mc.shape == (order + 1, 0)
+    assert analyzer.n_iter_.shape == (0,)
+
+
+def test_overshoot(order=4, n_fft=16, T=600):
+    # Some frames overshoot so far that the exponential overflows.
+    S = np.random.RandomState(12345).rand(n_fft // 2 + 1, T) + 0.1
+    analyzer = horoscopy.McepAnalyzer(M=order, n_fft=n_fft)
+    mc, n = horoscopy.stft_to_mcep(S, M=order, return_n_iter=True)
+    mc2 = analyzer.analyze(S)
+    assert np.all(np.isfinite(mc2))
+    np.testing.assert_array_almost_equal(mc, mc2)
+    np.testing.assert_array_equal(n, analyzer.n_iter_)
+
+
+def test_breakdown(monkeypatch, order=4, n_fft=32, T=6):
+    S = np.random.rand(n_fft // 2 + 1, T) + 1
+    analyzer = horoscopy.McepAnalyzer(M=order, n_fft=n_fft)
+    mc = analyzer.analyze(S)
+
+    # Make the recursion break down on the first frame.
+    merchant_parks = horoscopy.analyzer._merchant_parks
+
+    def broken_merchant_parks(t_c, t_r, h_c, h_r, b, a, work):
+        merchant_parks(t_c, t_r, h_c, h_r, b, a, work)
+        a[:, 0] = np.nan
+
+    monkeypatch.setattr(horoscopy.analyzer, '_merchant_parks',
+                        broken_merchant_parks)
+    mc2 = analyzer.analyze(S)
+    np.testing.assert_array_almost_equal(mc, mc2)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+import numpy as np
+
+import horoscopy
+
+
+np.random.seed(12345)
+
+
+def test_stft_to_mcep_batch(order=4, n_fft=16):
+    S = [np.random.rand(n_fft // 2 + 1, T) + 1 for T in (3, 0, 7, 1)]
+    mc, n = horoscopy.stft_to_mcep_batch(S, M=order, max_frames=4,
+                                         return_n_iter=True)
+    assert len(mc) == len(S)
+    for S_u, mc_u, n_u in zip(S, mc, n):
+        mc2, n2 = horoscopy.stft_to_mcep(S_u, M=order, return_n_iter=True)
+        np.testing.assert_array_almost_equal(mc_u, mc2)
+        np.testing.assert_array_equal(n_u, n2)
+    assert mc[0].base is mc[2].base
+
+
+def test_wave_to_mcep_batch(order=4, n_fft=32, hop_length=8):
+    y = [np.random.randn(N) for N in (100, 5, 64)]
+    mc = horoscopy.wave_to_mcep_batch(y, M=order, n_fft=n_fft,
+                                      hop_length=hop_length)
+    for y_u, mc_u in zip(y, mc):
+        mc2 = horoscopy.wave_to_mcep(y_u, M=order, n_fft=n_fft,
+                                     hop_length=hop_length)
+        np.testing.assert_array_almost_equal(mc_u, mc2)
+
+
+def test_per_utterance_alpha(order=4, n_fft=16):
+    # The last two utterances are too short to build transforms for.
+    S = [np.random.rand(n_fft // 2 + 1, T) + 1 for T in (3, 5, 0, 2, 2, 1)]
+    a = [0.42, 0.1, 0.1, 0.42, 0.3, -0.2]
+    mc = horoscopy.stft_to_mcep_batch(S, M=order, alpha=a, max_frames=4)
+    for S_u, mc_u, a_u in zip(S, mc, a):
+        mc2 = horoscopy.stft_to_mcep(S_u, M=order, alpha=a_u)
+        np.testing.assert_array_almost_equal(mc_u, mc2)
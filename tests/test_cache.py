@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import numpy as np
+
+import horoscopy
+from horoscopy.cache import DiskCache, PlanCache, plan_cache
+
+
+def test_lru_eviction():
+    cache = PlanCache(maxsize=2)
+    cache.get('a', lambda: 1)
+    cache.get('b', lambda: 2)
+    cache.get('a', lambda: 1)
+    cache.get('c', lambda: 3)
+    assert 'a' in cache and 'b' not in cache and 'c' in cache
+    assert cache.info() == (1, 3, 2, 2)
+
+
+def test_thread_safety(n_threads=8):
+    cache = PlanCache(maxsize=4)
+    keys = [i % 6 for i in range(1000)]
+    with ThreadPoolExecutor(n_threads) as executor:
+        values = list(executor.map(lambda k: cache.get(k, lambda: k), keys))
+    assert values == keys
+    info = cache.info()
+    assert info.hits + info.misses == len(keys)
+    assert info.currsize == 4
+
+
+def test_alternating_alpha(m=4, M=20, a=0.42):
+    plan_cache.clear()
+    c = np.random.rand(m + 1, 100)
+    for _ in range(3):
+        g = horoscopy.freqt(c, M=M, alpha=a, recursive=False)
+        horoscopy.freqt(g, M=m, alpha=-a, recursive=False)
+    assert plan_cache.info().misses == 2
+
+
+def test_disk_cache(tmp_path, order=4, n_fft=16, T=10):
+    cache = DiskCache(str(tmp_path))
+    S = np.random.rand(n_fft // 2 + 1, T) + 1
+    mc, n = horoscopy.stft_to_mcep(S, M=order, return_n_iter=True)
+    mc2, n2 = horoscopy.stft_to_mcep(S, M=order, cache=cache,
+                                     return_n_iter=True)
+    mc3, n3 = horoscopy.stft_to_mcep(S, M=order, cache=cache,
+                                     return_n_iter=True)
+    np.testing.assert_array_equal(mc, mc2)
+    np.testing.assert_array_equal(mc, mc3)
+    np.testing.assert_array_equal(n, n3)
+    assert cache.info()[:2] == (1, 1)
+
+    # Another process sees the same entries.
+    cache2 = DiskCache(str(tmp_path))
+    horoscopy.stft_to_mcep(S, M=order, cache=cache2)
+    horoscopy.stft_to_mcep(S, M=order + 1, cache=cache2)
+    horoscopy.stft_to_mcep(S + 1, M=order, cache=cache2)
+    assert cache2.info()[:2] == (1, 2) and len(cache2) == 3
+
+
+def test_disk_cache_numpy_scalars(tmp_path, order=4, n_fft=16, T=5):
+    cache = DiskCache(str(tmp_path))
+    S = np.random.rand(n_fft // 2 + 1, T) + 1
+    mc = horoscopy.stft_to_mcep(S, M=order, n_iter=10, tol=0.0625, eps=0,
+                                energy_threshold=1e-3, cache=cache)
+    mc2 = horoscopy.stft_to_mcep(
+        S, M=np.int64(order), n_iter=np.int32(10), tol=np.float32(0.0625),
+        eps=np.int64(0), energy_threshold=np.float64(1e-3), cache=cache)
+    np.testing.assert_array_equal(mc, mc2)
+    assert cache.info()[:2] == (1, 1)
+
+
+def test_disk_cache_eviction(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1)
+    cache.get('a', lambda: (np.zeros(10),))
+    assert 'a' not in cache and len(cache) == 0
+
+    cache = DiskCache(str(tmp_path), max_bytes=1000)
+    cache.get('a', lambda: (np.zeros(10),))
+    size = cache.info().currsize
+    cache = DiskCache(str(tmp_path), max_bytes=2 * size)
+    cache.get('b', lambda: (np.ones(10),))
+    os.utime(os.path.join(str(tmp_path), 'a.npz'), (0, 0))
+    cache.get('c', lambda: (np.ones(10),))
+    assert 'a' not in cache and 'b' in cache and 'c' in cache
+    x, = cache.get('b', lambda: None)
+    np.testing.assert_array_equal(x, np.ones(10))
+    cache.clear()
+    assert len(cache) == 0 and cache.info()[:2] == (0, 0)
+
+
+def test_disk_cache_corrupted(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.get('a', lambda: (np.arange(10),))
+    filename = os.path.join(str(tmp_path), 'a.npz')
+    with open(filename, 'r+b') as f:
+        f.truncate(os.path.getsize(filename) // 2)
+    x, = cache.get('a', lambda: (np.ones(10),))
+    np.testing.assert_array_equal(x, np.ones(10))
+    assert cache.info()[:2] == (0, 2)
+    x, = cache.get('a', lambda: None)
+    np.testing.assert_array_equal(x, np.ones(10))
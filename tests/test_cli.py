@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+import os
+import shutil
+
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+from horoscopy.cli import main
+from horoscopy.utils import read_binary
+
+from utils import get_data
+
+
+def test_cli(tmp_path, order=24):
+    in_dir = os.path.join(str(tmp_path), 'wav', 'sub')
+    out_dir = os.path.join(str(tmp_path), 'mcep')
+    os.makedirs(in_dir)
+    shutil.copy(get_data('example.wav'), in_dir)
+    args = [os.path.dirname(in_dir), '-o', out_dir, '-m', str(order),
+            '-a', '0.42', '-j', '1', '-q']
+    assert main(args) == 0
+
+    out_file = os.path.join(out_dir, 'sub', 'example.mcep')
+    actual = read_binary(out_file)
+    actual = np.transpose(np.reshape(actual, (-1, order + 1)))
+    target = read_binary(get_data('example.mcep.from.sptk'))
+    target = np.transpose(np.reshape(target, (-1, order + 1)))
+    np.testing.assert_array_almost_equal(actual, target)
+
+    # Up-to-date output is skipped, but changed parameters are not.
+    mtime = os.path.getmtime(out_file)
+    assert main(args) == 0
+    assert os.path.getmtime(out_file) == mtime
+    assert main(args + ['--n-iter', '5']) == 0
+    assert os.path.getmtime(out_file) != mtime
+
+
+def test_sample_format(tmp_path, order=4):
+    sr, y = wavfile.read(get_data('example.wav'))
+    in_dir = os.path.join(str(tmp_path), 'wav')
+    out_dir = os.path.join(str(tmp_path), 'mcep')
+    os.makedirs(in_dir)
+    wavfile.write(os.path.join(in_dir, 'int16.wav'), sr, y)
+    wavfile.write(os.path.join(in_dir, 'int32.wav'), sr,
+                  y.astype(np.int32) << 16)
+    wavfile.write(os.path.join(in_dir, 'float32.wav'), sr,
+                  (y / 32768).astype(np.float32))
+    assert main([in_dir, '-o', out_dir, '-m', str(order), '-j', '1',
+                 '-q']) == 0
+
+    target = read_binary(os.path.join(out_dir, 'int16.mcep'))
+    for name in ('int32.mcep', 'float32.mcep'):
+        actual = read_binary(os.path.join(out_dir, name))
+        np.testing.assert_array_almost_equal(actual, target, decimal=4)
+
+
+def test_duplicate_outputs(tmp_path):
+    paths = []
+    for d in ('a', 'b'):
+        in_dir = os.path.join(str(tmp_path), d)
+        os.makedirs(in_dir)
+        shutil.copy(get_data('example.wav'), in_dir)
+        paths.append(os.path.join(in_dir, 'example.wav'))
+    out_dir = os.path.join(str(tmp_path), 'mcep')
+    with pytest.raises(SystemExit):
+        main(paths + ['-o', out_dir, '-j', '1', '-q'])
+    assert not os.path.exists(os.path.join(out_dir, 'example.mcep'))
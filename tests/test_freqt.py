@@ -7,6 +7,8 @@
 import numpy as np
 
 import horoscopy
+from horoscopy.freqt import (_freqt_matrix, _freqt_transposed,
+                             _freqt_transposed_serial)
 
 
 np.random.seed(12345)
@@ -37,3 +39,40 @@ def test_matrix_input(m=4, M=4, a=0.42):
     c2 = np.expand_dims(c, axis=-1)
     g2 = horoscopy.freqt(c2, M=M, alpha=a)[:, 0]
     np.testing.assert_array_almost_equal(g, g2)
+
+
+def test_recursive_vs_matrix(m=10, M=30, T=5, a=0.42):
+    c = np.random.rand(m + 1, T)
+    g = horoscopy.freqt(c, M=M, alpha=a, recursive=True)
+    g2 = horoscopy.freqt(c, M=M, alpha=a, recursive=False)
+    np.testing.assert_array_almost_equal(g, g2)
+
+
+def test_float32(m=10, M=30, T=5, a=0.42, seed=0):
+    c = np.random.RandomState(seed).rand(m + 1, T)
+    g = horoscopy.freqt(c, M=M, alpha=a)
+    for recursive in (True, False):
+        g2 = horoscopy.freqt(c, M=M, alpha=a, recursive=recursive,
+                             dtype=np.float32)
+        assert g2.dtype == np.float32
+        np.testing.assert_array_almost_equal(g, g2, decimal=5)
+
+
+def test_per_frame_alpha(m=10, M=30, T=6):
+    c = np.random.rand(m + 1, T)
+    a = np.array([0.42, -0.1, 0.42, 0.3, -0.1, 0.42])
+    for recursive in (True, False):
+        g = horoscopy.freqt(c, M=M, alpha=a, recursive=recursive)
+        for t in range(T):
+            g2 = horoscopy.freqt(c[:, t], M=M, alpha=a[t])
+            np.testing.assert_array_almost_equal(g[:, t], g2)
+
+
+def test_transposed(m=10, M=30, T=20):
+    g = np.random.rand(M + 1, T)
+    a = np.random.rand(T) - 0.5
+    for transposed in (_freqt_transposed, _freqt_transposed_serial):
+        c = transposed(g, m, a)
+        for t in range(T):
+            A = _freqt_matrix(m, M, a[t])
+            np.testing.assert_array_almost_equal(c[:, t], A.T @ g[:, t])
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+import subprocess
+import sys
+
+import horoscopy
+
+
+# Time budgets in seconds measured in a fresh interpreter. Loading the
+# compiled kernels includes the import of numba itself.
+IMPORT_BUDGET = 0.5
+WARM_START_BUDGET = 5
+
+# Names exported by the package before submodules were imported lazily.
+BASELINE_NAMES = ('check_alpha', 'freqt', 'get_sptk_window', 'mcep_to_stft',
+                  'solve_toeplitz_plus_hankel', 'sr_to_alpha', 'stft_to_mcep',
+                  'math', 'mcep', 'utils', 'version', 'window')
+
+
+def _run(code):
+    """Run code in a fresh interpreter and return its output.
+    """
+
+    return subprocess.run([sys.executable, '-c', code], check=True,
+                          stdout=subprocess.PIPE).stdout.decode()
+
+
+def test_lazy_import():
+    code = ('import time, sys\n'
+            'import numpy\n'
+            't = time.perf_counter()\n'
+            'import horoscopy\n'
+            'print(time.perf_counter() - t)\n'
+            'print(*sorted(m for m in ("numba", "scipy", "librosa")\n'
+            '              if m in sys.modules))\n')
+    elapsed, modules = _run(code).splitlines()
+    assert float(elapsed) < IMPORT_BUDGET
+    assert modules == ''
+
+
+def test_cached_kernels():
+    # Make sure that the kernels are compiled and cached.
+    horoscopy.McepAnalyzer
+    code = ('import time\n'
+            't = time.perf_counter()\n'
+            'import horoscopy\n'
+            'horoscopy.McepAnalyzer\n'
+            'horoscopy.stft_to_mcep([1, 2, 3])\n'
+            'print(time.perf_counter() - t)\n')
+    assert float(_run(code)) < WARM_START_BUDGET
+
+
+def test_public_names():
+    for name in horoscopy.__all__:
+        assert getattr(horoscopy, name) is not None
+    for name in BASELINE_NAMES:
+        assert getattr(horoscopy, name) is not None
+    assert callable(horoscopy.freqt)
+    assert 'stft_to_mcep' in dir(horoscopy)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+import numpy as np
+from scipy.linalg import hankel, toeplitz
+
+from horoscopy.math import solve_toeplitz_plus_hankel
+
+
+np.random.seed(12345)
+
+
+def test_toeplitz_plus_hankel(N=7, K=3):
+    t_c = np.random.rand(N, K)
+    t_c[0] += N
+    t_r = np.random.rand(N, K)
+    t_r[0] = t_c[0]
+    h_c = np.random.rand(N, K)
+    h_r = np.random.rand(N, K)
+    h_c[0] = h_r[-1]
+    b = np.random.rand(N, K)
+    a = solve_toeplitz_plus_hankel((t_c, t_r), (h_c, h_r), b)
+    for k in range(K):
+        A = (toeplitz(t_c[:, k], t_r[:, k]) + hankel(h_r[:, k], h_c[:, k]))
+        np.testing.assert_array_almost_equal(np.matmul(A, a[:, k]), b[:, k])
+
+
+def test_singular_leading_submatrix(N=3):
+    t = np.array([0.0, 1.0, 2.0])
+    h = np.zeros(N)
+    b = np.random.rand(N)
+    a = solve_toeplitz_plus_hankel((t, t), (h, h), b)
+    np.testing.assert_array_almost_equal(np.matmul(toeplitz(t), a), b)
+
+
+def test_singular_system(N=3):
+    t = np.stack([np.ones(N), np.arange(N, 0, -1.0)], axis=-1)
+    h = np.zeros((N, 2))
+    b = np.stack([np.full(N, N, dtype=np.float64), np.random.rand(N)],
+                 axis=-1)
+    a = solve_toeplitz_plus_hankel((t, t), (h, h), b)
+    np.testing.assert_array_almost_equal(a[:, 0], np.ones(N))
+    np.testing.assert_array_almost_equal(
+        np.matmul(toeplitz(t[:, 1]), a[:, 1]), b[:, 1])
+
+
+def test_matrix_input(N=5):
+    t = np.random.rand(N)
+    t[0] += N
+    h = np.random.rand(N)
+    b = np.random.rand(N)
+    a = solve_toeplitz_plus_hankel((t, t), (h, h), b)
+    a2 = solve_toeplitz_plus_hankel(
+        (t[:, None], t[:, None]), (h[:, None], h[:, None]), b[:, None])[:, 0]
+    np.testing.assert_array_almost_equal(a, a2)
+
+
+def test_float32(N=5, seed=0):
+    rng = np.random.RandomState(seed)
+    t = rng.rand(N)
+    t[0] += N
+    h = rng.rand(N)
+    b = rng.rand(N)
+    a = solve_toeplitz_plus_hankel((t, t), (h, h), b)
+    for parallel in (True, False):
+        a2 = solve_toeplitz_plus_hankel((t, t), (h, h), b, parallel=parallel,
+                                        dtype=np.float32)
+        assert a2.dtype == np.float32
+        np.testing.assert_array_almost_equal(a, a2, decimal=5)
@@ -4,15 +4,22 @@
 # Copyright (c) 2020 Takenori Yoshimura
 # Licensed under the MIT license
 
+import time
+
 import librosa
 import numpy as np
+import pytest
 
 import horoscopy
+from horoscopy.cache import plan_cache
 from horoscopy.utils import read_binary
 
 from utils import get_data
 
 
+np.random.seed(12345)
+
+
 def test_stft_to_mcep(wav_file=get_data('example.wav'),
                       mcep_file=get_data('example.mcep.from.sptk'),
                       n_fft=512, hop_length=80, win_length=400,
@@ -30,9 +37,164 @@ def test_stft_to_mcep(wav_file=get_data('example.wav'),
     np.testing.assert_array_almost_equal(actual, target)
 
 
+def test_wave_to_mcep(wav_file=get_data('example.wav'),
+                      mcep_file=get_data('example.mcep.from.sptk'),
+                      n_fft=512, hop_length=80, win_length=400,
+                      win_func='blackman', order=24):
+    y, sr = librosa.load(wav_file, sr=None)
+    y *= 32768
+    actual = horoscopy.wave_to_mcep(
+        y, M=order, n_fft=n_fft, hop_length=hop_length,
+        win_length=win_length, window=win_func, max_frames=100)
+
+    target = read_binary(mcep_file)
+    target = np.transpose(np.reshape(target, (-1, order + 1)))
+    np.testing.assert_array_almost_equal(actual, target)
+
+    S = np.abs(librosa.stft(
+        y, n_fft=n_fft, hop_length=hop_length, win_length=win_length,
+        window=horoscopy.window.get_sptk_window(win_func, win_length),
+        center=False))
+    mc = horoscopy.stft_to_mcep(S, M=order)
+    mc2 = horoscopy.wave_to_mcep(
+        y, M=order, n_fft=n_fft, hop_length=hop_length,
+        win_length=win_length, window=win_func, center=False)
+    np.testing.assert_array_almost_equal(mc, mc2)
+
+
+def test_float32(wav_file=get_data('example.wav'),
+                 mcep_file=get_data('example.mcep.from.sptk'),
+                 n_fft=512, hop_length=80, win_length=400,
+                 win_func='blackman', order=24):
+    y, sr = librosa.load(wav_file, sr=None)
+    y *= 32768
+    actual = horoscopy.wave_to_mcep(
+        y, M=order, n_fft=n_fft, hop_length=hop_length,
+        win_length=win_length, window=win_func, dtype=np.float32)
+    assert actual.dtype == np.float32
+
+    target = read_binary(mcep_file)
+    target = np.transpose(np.reshape(target, (-1, order + 1)))
+    np.testing.assert_array_almost_equal(actual, target, decimal=4)
+
+    S = horoscopy.mcep_to_stft(actual, n_fft=n_fft, dtype=np.float32)
+    assert S.dtype == np.float32
+
+
 def test_matrix_input(order=2):
     S = np.arange(1, 6)
     mc = horoscopy.stft_to_mcep(S, M=order)
     S2 = np.expand_dims(S, axis=-1)
     mc2 = horoscopy.stft_to_mcep(S2, M=order)[:, 0]
     np.testing.assert_array_almost_equal(mc, mc2)
+
+
+def test_frame_independence(order=4, n_fft=16, T=5):
+    S = np.random.rand(n_fft // 2 + 1, T) + 0.1
+    mc, n = horoscopy.stft_to_mcep(S, M=order, return_n_iter=True)
+    for t in range(T):
+        mc2, n2 = horoscopy.stft_to_mcep(S[:, t], M=order, return_n_iter=True)
+        np.testing.assert_array_almost_equal(mc[:, t], mc2)
+        assert n[t] == n2
+
+
+def test_warm_start(order=4, n_fft=32, T=6, tol=1e-10):
+    mc = np.cumsum(np.random.rand(order + 1, T) - 0.5, axis=1)
+    S = horoscopy.mcep_to_stft(mc, n_fft=n_fft) * np.random.rand(1, T)
+    mc, n = horoscopy.stft_to_mcep(S, M=order, tol=tol, return_n_iter=True)
+    mc2 = horoscopy.stft_to_mcep(S, M=order, tol=tol, init='previous')
+    np.testing.assert_array_almost_equal(mc, mc2)
+    mc3, n3 = horoscopy.stft_to_mcep(S, M=order, tol=tol, init=mc,
+                                     return_n_iter=True)
+    np.testing.assert_array_almost_equal(mc, mc3)
+    # Starting from the solution, the second iteration detects convergence,
+    # which is the fewest possible; cold starts may also need only two.
+    assert np.all(n3 == 2) and np.all(n3 <= n)
+
+
+def test_fast_path(order=4, n_fft=16, T=4):
+    S = np.random.rand(n_fft // 2 + 1, T) + 0.1
+    S[:, 1] = 0
+    S[:, 2] = 1
+    mc, mask = horoscopy.stft_to_mcep(S, M=order, energy_threshold=1e-6,
+                                      flatness_threshold=0.99,
+                                      return_mask=True)
+    assert np.all(np.isfinite(mc))
+    np.testing.assert_array_equal(mask, [False, True, True, False])
+    mc2 = horoscopy.stft_to_mcep(S[:, (0, 3)], M=order)
+    np.testing.assert_array_almost_equal(mc[:, (0, 3)], mc2)
+
+
+def test_block_processing(order=4, n_fft=16, T=9):
+    S = np.random.rand(n_fft // 2 + 1, T) + 0.1
+    for init in (None, 'previous'):
+        mc = horoscopy.stft_to_mcep(S, M=order, init=init)
+        mc2 = horoscopy.stft_to_mcep(S, M=order, init=init, max_frames=3)
+        np.testing.assert_array_almost_equal(mc, mc2)
+        mc3 = horoscopy.stft_to_mcep(S, M=order, init=init, memory_limit=1)
+        np.testing.assert_array_almost_equal(mc, mc3)
+
+
+def test_n_jobs(order=4, n_fft=16, T=600):
+    S = np.random.rand(n_fft // 2 + 1, T) + 0.1
+    mc = horoscopy.stft_to_mcep(S, M=order)
+    mc1 = horoscopy.stft_to_mcep(S, M=order, n_jobs=1)
+    np.testing.assert_array_almost_equal(mc, mc1)
+    for n_jobs in (2, 3, -1):
+        mc2 = horoscopy.stft_to_mcep(S, M=order, n_jobs=n_jobs)
+        np.testing.assert_array_equal(mc1, mc2)
+
+
+def test_fused_operator(order=24, n_fft=512, T=30, a=0.42):
+    plan_cache.clear()
+    mc = np.random.rand(order + 1, T) - 0.5
+    S = [horoscopy.mcep_to_stft(mc[:, t], n_fft=n_fft, alpha=a)
+         for t in range(T)]
+    S2 = horoscopy.mcep_to_stft(mc, n_fft=n_fft, alpha=a)
+    np.testing.assert_array_almost_equal(np.stack(S, axis=-1), S2)
+
+
+def test_envelope(order=24, n_fft=512, sr=16000, a=0.42):
+    mc = np.random.rand(order + 1) - 0.5
+    S = horoscopy.mcep_to_stft(mc, n_fft=n_fft, alpha=a)
+    H = horoscopy.mcep_to_envelope(mc, n_freqs=n_fft // 2 + 1, alpha=a)
+    np.testing.assert_array_almost_equal(S, H)
+    H2 = horoscopy.mcep_to_envelope(mc, alpha=a, sr=sr, fmin=0, fmax=4000,
+                                    n_freqs=n_fft // 4 + 1)
+    np.testing.assert_array_almost_equal(S[:n_fft // 4 + 1], H2)
+
+
+def test_per_frame_alpha(order=4, n_fft=16, T=7):
+    S = np.random.rand(n_fft // 2 + 1, T) + 1
+    a = np.array([0.1, 0.42, 0.1, 0.35, 0.42, 0.1, 0.35])
+    mc = horoscopy.stft_to_mcep(S, M=order, alpha=a, max_frames=2)
+    S2 = horoscopy.mcep_to_stft(mc, n_fft, alpha=a)
+    for t in range(T):
+        mc2 = horoscopy.stft_to_mcep(S[:, t], M=order, alpha=a[t])
+        np.testing.assert_array_almost_equal(mc[:, t], mc2)
+        S3 = horoscopy.mcep_to_stft(mc2, n_fft, alpha=a[t])
+        np.testing.assert_array_almost_equal(S2[:, t], S3)
+
+    with pytest.raises(ValueError):
+        horoscopy.stft_to_mcep(S, M=order, alpha=a[:-1])
+
+
+def test_distinct_alphas(order=24, n_fft=512, T=2000):
+    # Frames of distinct alphas take about as long as those of one alpha.
+    S = np.random.rand(n_fft // 2 + 1, T) + 0.1
+    a = np.linspace(0.3, 0.5, T)
+    a[:order + 1] = 0.42
+    elapsed = []
+    for alpha in (0.42, a):
+        # The first call may load kernels and build transforms.
+        for _ in range(2):
+            t = time.perf_counter()
+            mc = horoscopy.stft_to_mcep(S, M=order, alpha=alpha)
+        elapsed.append(time.perf_counter() - t)
+    assert elapsed[1] < 10 * elapsed[0]
+
+    mc2 = horoscopy.stft_to_mcep(S, M=order, alpha=a, n_jobs=2)
+    np.testing.assert_array_almost_equal(mc, mc2)
+    for t in (0, order, order + 1, T - 1):
+        mc3 = horoscopy.stft_to_mcep(S[:, t], M=order, alpha=a[t])
+        np.testing.assert_array_almost_equal(mc[:, t], mc3)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+import os
+
+import numpy as np
+import pytest
+
+import horoscopy
+from horoscopy.utils import read_binary, write_binary
+
+
+np.random.seed(12345)
+
+
+class _Interrupted(Exception):
+    pass
+
+
+class _LazyArray(object):
+    """Array-like raising an exception when frames out of range are read.
+    """
+
+    def __init__(self, S, start, stop):
+        self.S = S
+        self.shape = S.shape
+        self.start = start
+        self.stop = stop
+
+    def __getitem__(self, key):
+        if key[1].start < self.start or self.stop < key[1].stop:
+            raise _Interrupted
+        return self.S[key]
+
+
+def test_stft_to_mcep_memmap(tmp_path, order=4, n_fft=16, T=50):
+    S = np.random.rand(T, n_fft // 2 + 1) + 0.1
+    in_file = str(tmp_path / 'S.bin')
+    out_file = str(tmp_path / 'mc.bin')
+    write_binary(in_file, S)
+    S = read_binary(in_file, dim=n_fft // 2 + 1, mmap=True).T
+
+    for init in (None, 'previous'):
+        mc = horoscopy.stft_to_mcep(S, M=order, init=init)
+        mc2 = horoscopy.stft_to_mcep_memmap(S, out_file, M=order, init=init,
+                                            block_frames=8)
+        assert isinstance(mc2, np.memmap) and mc2.shape == mc.shape
+        np.testing.assert_array_almost_equal(mc, mc2)
+        np.testing.assert_array_equal(
+            mc2.T, read_binary(out_file, dim=order + 1))
+        assert not os.path.exists(out_file + '.progress')
+
+
+def test_resume(tmp_path, order=4, n_fft=16, T=50):
+    S = np.random.rand(n_fft // 2 + 1, T) + 0.1
+    out_file = str(tmp_path / 'mc.bin')
+    mc = np.array(horoscopy.stft_to_mcep_memmap(
+        S, out_file, M=order, init='previous', block_frames=8))
+
+    with pytest.raises(_Interrupted):
+        horoscopy.stft_to_mcep_memmap(_LazyArray(S, 0, 30), out_file,
+                                      M=order, init='previous',
+                                      block_frames=8)
+    assert os.path.exists(out_file + '.progress')
+
+    # Only the blocks after the last saved one are read.
+    mc2 = horoscopy.stft_to_mcep_memmap(_LazyArray(S, 24, T), out_file,
+                                        M=order, init='previous',
+                                        block_frames=8)
+    np.testing.assert_array_equal(mc, mc2)
+    assert not os.path.exists(out_file + '.progress')
+
+
+def test_numpy_scalars(tmp_path, order=4, n_fft=16, T=10):
+    S = np.random.rand(n_fft // 2 + 1, T) + 1
+    out_file = str(tmp_path / 'mc.bin')
+    mc = horoscopy.stft_to_mcep(S, M=order, alpha=0.375)
+    mc2 = horoscopy.stft_to_mcep_memmap(
+        S, out_file, M=np.int64(order), alpha=np.float32(0.375),
+        n_iter=np.int64(10), block_frames=np.int64(4))
+    np.testing.assert_array_almost_equal(mc, mc2)
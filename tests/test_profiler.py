@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+import json
+
+import numpy as np
+
+import horoscopy
+from horoscopy.cache import plan_cache
+
+
+np.random.seed(12345)
+
+
+def test_profiler(tmp_path, order=4, n_fft=16, T=20):
+    S = np.random.rand(n_fft // 2 + 1, T) + 1
+    S[:, 0] = 0
+    plan_cache.clear()
+    with horoscopy.Profiler(trace_memory=True) as prof:
+        mc, n = horoscopy.stft_to_mcep(S, M=order, energy_threshold=1e-6,
+                                       return_n_iter=True)
+    records = prof.to_dict()
+
+    for stage in ('periodogram', 'initial_guess', 'newton', 'mcep_to_stft',
+                  'irfft', 'freqt', 'solve', 'plan_build'):
+        assert 0 < records['stages'][stage]['calls']
+    assert records['stages']['solve']['calls'] == np.max(n)
+    assert 0 < records['counters']['plan_cache_misses']
+    assert 0 < records['peak_bytes']
+
+    frames = records['frames']
+    assert frames['total'] == T and frames['fast'] == 1
+    np.testing.assert_array_equal(frames['n_iter_histogram'], np.bincount(n))
+
+    iterations = records['iterations']
+    assert len(iterations) == np.max(n)
+    assert iterations[0]['frames'] == T - 1
+    assert sum(it['converged'] for it in iterations) == np.sum(0 < n)
+    assert iterations[-1]['epsilon_mean'] <= iterations[0]['epsilon_mean']
+
+    filename = str(tmp_path / 'prof.json')
+    prof.to_json(filename)
+    with open(filename) as f:
+        assert json.load(f) == json.loads(prof.to_json())
+
+
+def test_disabled(order=4, n_fft=16, T=5):
+    S = np.random.rand(n_fft // 2 + 1, T) + 1
+    with horoscopy.Profiler() as prof:
+        pass
+    horoscopy.stft_to_mcep(S, M=order)
+    records = prof.to_dict()
+    assert not records['stages'] and records['frames']['total'] == 0
+    assert records['peak_bytes'] is None
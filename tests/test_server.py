@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+
+import numpy as np
+import pytest
+
+import horoscopy
+from horoscopy.server import AnalysisClient, AnalysisServer
+
+
+np.random.seed(12345)
+
+
+@pytest.mark.parametrize('n_workers', [1, 3])
+def test_server(tmp_path, n_workers, order=4, n_fft=16, n_requests=8):
+    path = os.path.join(str(tmp_path), 'horoscopy.sock')
+    server = AnalysisServer(max_batch_frames=20, max_wait=0.05,
+                            n_workers=n_workers)
+    loop = asyncio.new_event_loop()
+    s = loop.run_until_complete(server.start(path=path))
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+
+    S = [np.random.rand(n_fft // 2 + 1, T) + 1
+         for T in np.random.randint(1, 10, n_requests)]
+
+    def request(S):
+        with AnalysisClient(path=path) as client:
+            mc = client.stft_to_mcep(S, M=order)
+            return mc, client.mcep_to_stft(mc, n_fft=n_fft)
+
+    try:
+        with ThreadPoolExecutor(n_requests) as executor:
+            results = list(executor.map(request, S))
+        for S_u, (mc, S2) in zip(S, results):
+            mc2 = horoscopy.stft_to_mcep(S_u, M=order)
+            np.testing.assert_array_almost_equal(mc, mc2)
+            S3 = horoscopy.mcep_to_stft(mc2, n_fft=n_fft)
+            np.testing.assert_array_almost_equal(S2, S3)
+
+        with AnalysisClient(path=path) as client:
+            mc = client.stft_to_mcep(S[0][:, 0], M=order)
+            assert mc.shape == (order + 1,)
+            with pytest.raises(ValueError):
+                client.stft_to_mcep(S[0], return_n_iter=True)
+            with pytest.raises(ValueError):
+                client.stft_to_mcep(S[0], alpha=[0.42] * S[0].shape[1])
+            with pytest.raises(ValueError):
+                client.stft_to_mcep(S[0], init='previous')
+    finally:
+        s.close()
+        asyncio.run_coroutine_threadsafe(s.wait_closed(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+        server.close()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+import librosa
+import numpy as np
+
+import horoscopy
+
+
+np.random.seed(12345)
+
+
+def test_streaming_analyzer(order=4, n_fft=64, hop_length=10, win_length=50,
+                            N=1000):
+    y = np.random.randn(N)
+    w = horoscopy.window.get_sptk_window('blackman', win_length)
+    S = np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length,
+                            win_length=win_length, window=w,
+                            pad_mode='constant'))
+    for init in (None, 'previous'):
+        target = horoscopy.stft_to_mcep(S, M=order, init=init)
+        analyzer = horoscopy.StreamingAnalyzer(
+            M=order, n_fft=n_fft, hop_length=hop_length,
+            win_length=win_length, init=init)
+        mc = []
+        n_frames = 0
+        for y_chunk in np.split(y, np.cumsum(np.random.randint(1, 50, 40))):
+            mc.append(analyzer.process(y_chunk))
+            n_frames += len(y_chunk)
+            T = max(0, (n_frames - analyzer.latency) // hop_length + 1)
+            assert sum(m.shape[1] for m in mc) == T
+        mc.append(analyzer.flush())
+        actual = np.concatenate(mc, axis=1)
+        np.testing.assert_array_almost_equal(actual, target)
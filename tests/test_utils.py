@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Takenori Yoshimura
+# Licensed under the MIT license
+
+import numpy as np
+import pytest
+
+from horoscopy.utils import (iter_binary, read_binary, sr_to_alpha,
+                             write_binary)
+
+from utils import get_data
+
+
+np.random.seed(12345)
+
+
+def test_read_binary(mcep_file=get_data('example.mcep.from.sptk'), order=24):
+    x = read_binary(mcep_file)
+    assert x.dtype == np.float64 and x.ndim == 1
+    x2 = read_binary(mcep_file, dim=order + 1, mmap=True)
+    assert isinstance(x2, np.memmap) and not x2.flags.writeable
+    np.testing.assert_array_equal(np.reshape(x, (-1, order + 1)), x2)
+
+    with pytest.raises(ValueError):
+        read_binary(mcep_file, dim=7)
+
+
+@pytest.mark.parametrize('dtype', ['char', 'short', 'int', 'float', 'double'])
+@pytest.mark.parametrize('endian', ['=', '<', '>'])
+def test_write_binary(tmp_path, dtype, endian, T=5, dim=3):
+    filename = str(tmp_path / 'x.bin')
+    x = np.arange(T * dim).reshape(T, dim) - T * dim // 2
+    write_binary(filename, x, dtype=dtype, endian=endian)
+    for mmap in (False, True):
+        x2 = read_binary(filename, dtype=dtype, dim=dim, endian=endian,
+                         mmap=mmap)
+        np.testing.assert_array_equal(x, x2)
+
+
+def test_iter_binary(tmp_path, T=10, dim=4, block_size=3):
+    filename = str(tmp_path / 'x.bin')
+    x = np.random.rand(T, dim).astype(np.float32)
+    write_binary(filename, x)
+    blocks = list(iter_binary(filename, block_size, dtype='float', dim=dim))
+    assert [len(b) for b in blocks] == [3, 3, 3, 1]
+    np.testing.assert_array_equal(x, np.concatenate(blocks))
+
+    write_binary(filename, x[:0])
+    assert len(read_binary(filename, dtype='float', mmap=True)) == 0
+    assert not list(iter_binary(filename, block_size, dtype='float'))
+
+
+@pytest.mark.parametrize('sr, alpha', [(8000, 0.31), (16000, 0.41),
+                                       (48000, 0.55)])
+def test_sr_to_alpha(sr, alpha, step=0.01):
+    a, e = sr_to_alpha(sr, step=step, return_error=True)
+    assert a == pytest.approx(alpha)
+    a2, e2 = sr_to_alpha(sr, step=step, refine=True, return_error=True)
+    assert abs(a - a2) < step and e2 <= e
+    assert sr_to_alpha(sr, step=step, refine=True) == a2
+
+    for scale in ('bark', 'erb'):
+        assert a < sr_to_alpha(sr, scale=scale) < 1
+    with pytest.raises(ValueError):
+        sr_to_alpha(sr, scale='hz')